@@ -1,4 +1,7 @@
 // Vercel Serverless Function - Yahoo Finance API 代理
+// 可用 YAHOO_CHART_BASE 指向本機模擬上游（scripts/loadtest.py）
+const YAHOO_CHART_BASE = process.env.YAHOO_CHART_BASE || 'https://query1.finance.yahoo.com'
+
 export default async function handler(req, res) {
   // 設定 CORS 標頭
   res.setHeader('Access-Control-Allow-Origin', '*')
@@ -28,13 +31,13 @@ export default async function handler(req, res) {
     const timeInterval = interval || '1d'
     
     // 如果使用 range 參數，使用簡單格式
-    let url = `https://query1.finance.yahoo.com/v8/finance/chart/${symbol}?interval=${timeInterval}&range=${timeRange}`
+    let url = `${YAHOO_CHART_BASE}/v8/finance/chart/${symbol}?interval=${timeInterval}&range=${timeRange}`
     
     // 如果 range 是 1y 或更長，使用時間戳確保獲取足夠資料
     if (timeRange === '1y' || timeRange === '2y' || timeRange === 'max') {
       const now = Math.floor(Date.now() / 1000)
       const yearAgo = now - (365 * 24 * 60 * 60) // 1 年前
-      url = `https://query1.finance.yahoo.com/v8/finance/chart/${symbol}?period1=${yearAgo}&period2=${now}&interval=${timeInterval}`
+      url = `${YAHOO_CHART_BASE}/v8/finance/chart/${symbol}?period1=${yearAgo}&period2=${now}&interval=${timeInterval}`
     }
     
     const response = await fetch(url, {
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+市場廣度與產業彙總（僅使用 Python 標準庫）
+- 單次走訪全部股票結果，同時累計全市場與各產業（ISIN 產業別）的統計量
+- 輸出 public/aggregates.json，前端可直接繪製儀表板，不需下載或掃描整份 data.json
+- 欄位以 screener.py 的取值函式讀取，可直接走訪 UniverseState（StockRow）或 dict 清單
+"""
+
+from screener import NUMERIC_FIELDS, CATEGORY_FIELDS
+
+UNCLASSIFIED = '未分類'
+
+_price = NUMERIC_FIELDS['price']
+_change_percent = NUMERIC_FIELDS['changePercent']
+_sma20 = NUMERIC_FIELDS['sma20']
+_rsi = NUMERIC_FIELDS['rsi']
+_action = CATEGORY_FIELDS['action']
+_sector = CATEGORY_FIELDS['sector']
+
+
+class _Group:
+    __slots__ = ('count', 'advancers', 'decliners', 'unchanged', 'above_sma20', 'with_sma20',
+                 'rsi_sum', 'rsi_count', 'change_sum', 'actions')
+
+    def __init__(self):
+        self.count = 0
+        self.advancers = 0
+        self.decliners = 0
+        self.unchanged = 0
+        self.above_sma20 = 0
+        self.with_sma20 = 0
+        self.rsi_sum = 0.0
+        self.rsi_count = 0
+        self.change_sum = 0.0
+        self.actions = {'buy': 0, 'sell': 0, 'hold': 0}
+
+    def add(self, stock):
+        self.count += 1
+        chg = _change_percent(stock) or 0
+        if chg > 0:
+            self.advancers += 1
+        elif chg < 0:
+            self.decliners += 1
+        else:
+            self.unchanged += 1
+        self.change_sum += chg
+
+        sma20 = _sma20(stock)
+        if sma20:
+            self.with_sma20 += 1
+            if (_price(stock) or 0) > sma20:
+                self.above_sma20 += 1
+        rsi_v = _rsi(stock)
+        if rsi_v is not None:
+            self.rsi_sum += rsi_v
+            self.rsi_count += 1
+
+        action = _action(stock) or 'hold'
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'advancers': self.advancers,
+            'decliners': self.decliners,
+            'unchanged': self.unchanged,
+            'pctAboveSma20': round(self.above_sma20 / self.with_sma20 * 100, 2) if self.with_sma20 else None,
+            'avgRsi': round(self.rsi_sum / self.rsi_count, 2) if self.rsi_count else None,
+            'avgChangePercent': round(self.change_sum / self.count, 2) if self.count else None,
+            'actions': dict(self.actions),
+        }
+
+
+def compute_aggregates(stocks, updated_at: str) -> dict:
+    """回傳 {'updatedAt', 'market': {...}, 'sectors': {產業別: {...}}}，產業依名稱排序"""
+    market = _Group()
+    sectors = {}
+    for stock in stocks:
+        market.add(stock)
+        key = _sector(stock) or UNCLASSIFIED
+        group = sectors.get(key)
+        if group is None:
+            group = sectors[key] = _Group()
+        group.add(stock)
+    return {
+        'updatedAt': updated_at,
+        'market': market.to_dict(),
+        'sectors': {name: sectors[name].to_dict() for name in sorted(sectors)},
+    }
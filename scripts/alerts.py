@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+價格 / 指標警示引擎（僅使用 Python 標準庫）
+- 警示規則設定於 config.json 的 alerts.rules，例如：
+    {"id": "tsmc-1100", "symbol": "2330.TW", "field": "price", "op": "above", "value": 1100}
+    {"id": "tsmc-oversold", "symbol": "2330.TW", "field": "rsi", "op": "below", "value": 30}
+    {"id": "0050-macd", "symbol": "0050.TW", "field": "signals", "op": "has", "value": "MACD金叉+RSI偏低"}
+    {"id": "2454-buy", "symbol": "2454.TW", "field": "action", "op": "becomes", "value": "buy"}
+- 數值欄位（與 screener.py 相同）依 (代碼, 欄位, 方向) 建立排序門檻索引；
+  值由 old 變為 new 時以 bisect 取出 (old, new] 區間內的門檻，成本為 O(log k + 觸發數)
+- 類別欄位（action / volumeTrend）與訊號（signals）以 值 -> 規則 的反向索引處理
+- 只有變動的 (代碼, 欄位) 需要查詢，評估成本與價格變動數成正比，與註冊的規則總數無關
+- 格式錯誤的規則（缺欄位、型別錯誤、不支援的欄位或運算子、id 重複）記錄後略過，不影響其他規則與更新流程
+- 上次的值存於 .cache/alerts/last.json；觸發結果輸出 public/alerts.json
+
+使用方式：
+    python scripts/alerts.py --data public/data.json
+"""
+
+import argparse
+import json
+import os
+from bisect import bisect_right
+from pathlib import Path
+
+from screener import NUMERIC_FIELDS, CATEGORY_FIELDS, MULTI_FIELDS
+
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+DATA_PATH = Path(__file__).parent.parent / 'public' / 'data.json'
+ALERTS_PATH = Path(__file__).parent.parent / 'public' / 'alerts.json'
+STATE_PATH = Path(__file__).parent.parent / '.cache' / 'alerts' / 'last.json'
+
+RULE_KEYS = ('id', 'symbol', 'field', 'op', 'value')
+NUMERIC_OPS = ('above', 'below')
+OP_LABELS = {'above': '向上突破', 'below': '向下跌破', 'becomes': '轉為', 'has': '出現訊號'}
+
+
+class AlertIndex:
+    """規則索引。
+    numeric: (代碼, 欄位, 方向) -> ([門檻（遞增）], [規則])
+    category: (代碼, 欄位) -> {值: [規則]}
+    """
+
+    def __init__(self, rules=()):
+        """rules 中格式錯誤的規則不會加入，連同原因記錄於 skipped: [(規則, 原因)]"""
+        self.numeric = {}
+        self.category = {}
+        self.fields = {}
+        self.rules = {}
+        self.skipped = []
+        for rule in rules:
+            try:
+                self.add(rule)
+            except ValueError as e:
+                self.skipped.append((rule, str(e)))
+
+    def __len__(self):
+        return len(self.rules)
+
+    def add(self, rule: dict):
+        """加入一條規則；缺少欄位、欄位或運算子不支援、門檻值型別錯誤或 id 重複時拋出 ValueError"""
+        if not isinstance(rule, dict):
+            raise ValueError(f"警示規則需為物件：{rule!r}")
+        missing = [key for key in RULE_KEYS if key not in rule]
+        if missing:
+            raise ValueError(f"警示規則缺少欄位：{', '.join(missing)}")
+        rid, symbol, field, op, value = (rule[key] for key in RULE_KEYS)
+        if not all(isinstance(v, str) for v in (rid, symbol, field, op)):
+            raise ValueError(f"警示規則的 id、symbol、field、op 需為字串：{rid!r}")
+        if rid in self.rules:
+            raise ValueError(f"警示規則 id 重複：{rid}")
+        if field in NUMERIC_FIELDS and op in NUMERIC_OPS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"數值警示規則的門檻需為數字：{value!r}")
+            thresholds, rules = self.numeric.setdefault((symbol, field, op), ([], []))
+            k = bisect_right(thresholds, float(value))
+            thresholds.insert(k, float(value))
+            rules.insert(k, rule)
+        elif (field in CATEGORY_FIELDS and op == 'becomes') or (field in MULTI_FIELDS and op == 'has'):
+            if not isinstance(value, str):
+                raise ValueError(f"類別警示規則的值需為字串：{value!r}")
+            self.category.setdefault((symbol, field), {}).setdefault(value, []).append(rule)
+        else:
+            raise ValueError(f"不支援的警示規則：{field} {op}")
+        self.rules[rid] = rule
+        fields = self.fields.setdefault(symbol, [])
+        if field not in fields:
+            fields.append(field)
+
+    def remove(self, rid: str):
+        """移除一條規則；索引項目清空時一併刪除，代碼不再有任何規則的欄位也自 fields 移除"""
+        rule = self.rules.pop(rid)
+        symbol, field, op = rule['symbol'], rule['field'], rule['op']
+        if op in NUMERIC_OPS:
+            key = (symbol, field, op)
+            thresholds, rules = self.numeric[key]
+            k = next(i for i, r in enumerate(rules) if r['id'] == rid)
+            del thresholds[k], rules[k]
+            if not rules:
+                del self.numeric[key]
+        else:
+            index = self.category[(symbol, field)]
+            index[rule['value']].remove(rule)
+            if not index[rule['value']]:
+                del index[rule['value']]
+            if not index:
+                del self.category[(symbol, field)]
+        if (symbol, field) in self.category or any((symbol, field, o) in self.numeric for o in NUMERIC_OPS):
+            return
+        fields = self.fields[symbol]
+        fields.remove(field)
+        if not fields:
+            del self.fields[symbol]
+
+    def crossed(self, symbol, field, old, new) -> list:
+        """數值由 old 變為 new 時穿越的規則：
+        above 觸發於 old < 門檻 <= new；below 觸發於 new < 門檻 <= old
+        """
+        if old is None or new is None or old == new:
+            return []
+        if new > old:
+            entry = self.numeric.get((symbol, field, 'above'))
+            lo_value, hi_value = old, new
+        else:
+            entry = self.numeric.get((symbol, field, 'below'))
+            lo_value, hi_value = new, old
+        if not entry:
+            return []
+        thresholds, rules = entry
+        return rules[bisect_right(thresholds, lo_value):bisect_right(thresholds, hi_value)]
+
+    def entered(self, symbol, field, old, new) -> list:
+        """類別值改變或新出現訊號時對應的規則"""
+        index = self.category.get((symbol, field))
+        if not index:
+            return []
+        if field in MULTI_FIELDS:
+            before = set(old or ())
+            return [r for v in (new or ()) if v not in before for r in index.get(v, ())]
+        if new == old:
+            return []
+        return list(index.get(new, ()))
+
+
+class AlertEngine:
+    """維護各代碼上次的欄位值，逐筆更新並回傳觸發的警示"""
+
+    def __init__(self, rules=(), last=None):
+        self.index = AlertIndex(rules)
+        self.last = last or {}
+
+    def update(self, symbol: str, values: dict) -> list:
+        """以代碼最新的欄位值（例如盤中只有 {'price': x}）更新，回傳觸發的警示"""
+        fields = self.index.fields.get(symbol)
+        if not fields:
+            return []
+        prev = self.last.setdefault(symbol, {})
+        triggered = []
+        for field in fields:
+            if field not in values:
+                continue
+            new = values[field]
+            if field in prev:
+                old = prev[field]
+                if field in NUMERIC_FIELDS:
+                    rules = self.index.crossed(symbol, field, old, new)
+                else:
+                    rules = self.index.entered(symbol, field, old, new)
+                triggered += [_event(rule, old, new) for rule in rules]
+            prev[field] = new
+        return triggered
+
+    def update_stock(self, stock) -> list:
+        """以單筆股票結果（data.json 的 dict 或 UniverseState 的 StockRow）更新"""
+        symbol = CATEGORY_FIELDS['symbol'](stock)
+        fields = self.index.fields.get(symbol)
+        if not fields:
+            return []
+        values = {}
+        for field in fields:
+            getter = NUMERIC_FIELDS.get(field) or CATEGORY_FIELDS.get(field) or MULTI_FIELDS.get(field)
+            values[field] = getter(stock)
+        return self.update(symbol, values)
+
+    def evaluate(self, stocks) -> list:
+        """以整份快照更新；沒有規則的代碼只需一次 dict 查詢"""
+        triggered = []
+        for stock in stocks:
+            triggered += self.update_stock(stock)
+        return triggered
+
+
+def _event(rule, old, new) -> dict:
+    label = OP_LABELS[rule['op']]
+    return {
+        'id': rule['id'],
+        'symbol': rule['symbol'],
+        'field': rule['field'],
+        'op': rule['op'],
+        'value': rule['value'],
+        'from': old,
+        'to': new,
+        'message': f"{rule['symbol']} {rule['field']} {label} {rule['value']}（{_fmt(old)} → {_fmt(new)}）",
+    }
+
+
+def _fmt(v):
+    if isinstance(v, list):
+        return '、'.join(v) or '無'
+    return '無' if v is None else v
+
+
+def load_state(path=STATE_PATH) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(last: dict, path=STATE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(last, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def run_alerts(rules, stocks, updated_at: str, state_path=STATE_PATH, path=ALERTS_PATH) -> list:
+    """以快照評估警示、保存上次的值並寫出 alerts.json，回傳觸發的警示"""
+    engine = AlertEngine(rules, load_state(state_path))
+    for rule, reason in engine.index.skipped:
+        rid = rule.get('id') if isinstance(rule, dict) else None
+        print(f"⚠️ 略過警示規則 {rid or repr(rule)}：{reason}")
+    triggered = engine.evaluate(stocks)
+    save_state(engine.last, state_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'updatedAt': updated_at, 'triggered': triggered}, f, ensure_ascii=False, indent=2)
+    return triggered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以快照評估 config.json 中的警示規則')
+    parser.add_argument('--data', default=str(DATA_PATH), help='快照路徑')
+    parser.add_argument('--state', default=str(STATE_PATH), help='上次欄位值的儲存路徑')
+    parser.add_argument('--out', default=str(ALERTS_PATH), help='觸發結果輸出路徑')
+    args = parser.parse_args(argv)
+
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        rules = (json.load(f).get('alerts') or {}).get('rules') or []
+    with open(args.data, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    triggered = run_alerts(rules, snapshot.get('stocks', []), snapshot.get('updatedAt'), args.state, args.out)
+    for event in triggered:
+        print(f"🔔 {event['message']}")
+    print(f"\n共 {len(rules)} 條規則，觸發 {len(triggered)} 條")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+考慮除權息的本地日 K 儲存（僅使用 Python 標準庫）
+- 每檔保存最近 historyDays 天的日 K：timestamp、收盤價（已含分割調整）、還原收盤價（adjclose）與成交量
+  月線完整指標需約 3 年日 K（預設 1130 天），首次抓取同樣天數、之後只補抓近期並在本地累積
+- 已有近期資料的代碼只需抓取較短區間（預設 1mo），與既有資料重疊的部分用來偵測公司行動：
+  重疊區最早一根 K 棒的收盤價或還原價與新回應不一致時，代表期間發生分割或除權息，
+  依比例就地調整該代碼較舊的 K 棒（分割同時調整收盤價與成交量，股利只調整還原價）
+- 沒有重疊時改用回應中的 events（dividends / splits）推算調整係數
+- 回應沒有 adjclose 時還原價只是收盤價的代替值（hasAdj 為 False），此時不以還原價判斷股利：
+  新回應有 adjclose 而舊資料沒有時，舊 K 棒的還原價依重疊處對齊新基準；新回應沒有時整段改回收盤價
+- 技術指標改以還原價計算，除息日不再出現假跌破；價格與漲跌仍以實際收盤價呈現
+- 存於 .cache/bars/（分片執行時各自一檔），以 os.replace 原子寫入
+"""
+
+import json
+import os
+from pathlib import Path
+
+BARS_DIR = Path(__file__).parent.parent / '.cache' / 'bars'
+STORE_VERSION = 2
+BAR_KEYS = ('ts', 'close', 'adj', 'volume')
+# 重疊 K 棒的相對差異超過此值即視為公司行動
+ADJ_TOLERANCE = 1e-4
+DAY = 86400
+
+
+def extract_bars(r0: dict) -> dict:
+    """由 chart API 的 result[0] 取出 {'ts','close','adj','volume','hasAdj'}；
+    沒有 adjclose 時以收盤價代替，hasAdj 為 False
+    """
+    ind = r0.get('indicators') or {}
+    quote = (ind.get('quote') or [{}])[0]
+    closes = quote.get('close') or []
+    adj = ((ind.get('adjclose') or [{}])[0] or {}).get('adjclose')
+    has_adj = bool(adj)
+    adj = adj or closes
+    timestamps = r0.get('timestamp') or []
+    n = len(timestamps)
+    volumes = quote.get('volume') or []
+    return {
+        'ts': list(timestamps),
+        'close': [closes[i] if i < len(closes) else None for i in range(n)],
+        'adj': [adj[i] if i < len(adj) else None for i in range(n)],
+        'volume': [volumes[i] if i < len(volumes) else None for i in range(n)],
+        'hasAdj': has_adj,
+    }
+
+
+def parse_events(r0: dict) -> list:
+    """回傳 [(除權息日 timestamp, 'split' | 'dividend', 數值)]，依日期排序。
+    split 的數值為 分母/分子（舊價格需乘上的係數），dividend 為每股現金股利
+    """
+    events = r0.get('events') or {}
+    out = []
+    for e in (events.get('splits') or {}).values():
+        num, den = e.get('numerator'), e.get('denominator')
+        if num and den:
+            out.append((int(e['date']), 'split', den / num))
+    for e in (events.get('dividends') or {}).values():
+        if e.get('amount'):
+            out.append((int(e['date']), 'dividend', float(e['amount'])))
+    out.sort()
+    return out
+
+
+def _differs(a, b):
+    return abs(a / b - 1) > ADJ_TOLERANCE
+
+
+class BarStore:
+    """以代碼為單位的日 K 儲存"""
+
+    def __init__(self, path, history_days=1130):
+        self.path = Path(path)
+        self.history_days = history_days
+        self.adjusted = 0
+        self._bars = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # 保留天數比目前設定短的檔案無法補足較舊的 K 棒，捨棄後重新抓取完整區間
+        if data.get('version') == STORE_VERSION and (data.get('historyDays') or 0) >= self.history_days:
+            self._bars = data.get('symbols') or {}
+
+    def __len__(self):
+        return len(self._bars)
+
+    def get(self, symbol: str):
+        return self._bars.get(symbol)
+
+    def is_recent(self, symbol: str, now_ts: float, max_gap_days=20) -> bool:
+        """已存資料的最後一根在 max_gap_days 天內時，只需抓取短區間即可與之重疊"""
+        bars = self._bars.get(symbol)
+        return bool(bars and bars['ts'] and now_ts - bars['ts'][-1] <= max_gap_days * DAY)
+
+    def _adjust(self, old, new, events):
+        """比對重疊 K 棒（或 events）推算係數，就地調整 old；回傳 [(類型, 係數)]"""
+        first_new = new['ts'][0]
+        position = {ts: j for j, ts in enumerate(new['ts'])}
+        old_has, new_has = old.get('hasAdj', True), new.get('hasAdj', True)
+        close_factor = adj_factor = 1.0
+        # 舊還原價只是收盤價時，依重疊處對齊新還原價的係數（不視為股利）
+        rebase = None
+        anchored = False
+        for i, ts in enumerate(old['ts']):
+            j = position.get(ts)
+            if j is None:
+                continue
+            oc, nc, oa, na = old['close'][i], new['close'][j], old['adj'][i], new['adj'][j]
+            if oc and nc and oa and na:
+                close_factor = nc / oc if _differs(nc, oc) else 1.0
+                if old_has and new_has:
+                    adj_factor = na / oa if _differs(na, oa) else 1.0
+                else:
+                    adj_factor = close_factor
+                    if new_has:
+                        rebase = na / oa
+                anchored = True
+                break
+
+        if not anchored:
+            # 沒有可比對的重疊 K 棒：以新區間內的事件推算
+            last_old = old['ts'][-1] if old['ts'] else 0
+            prev_close = next((c for c in reversed(old['close']) if c), None)
+            for ts, kind, value in events:
+                if ts <= last_old or ts > new['ts'][-1]:
+                    continue
+                if kind == 'split':
+                    close_factor *= value
+                    adj_factor *= value
+                else:
+                    # 股利係數 = 1 - 股利 / 除息前一日收盤價
+                    before = [c for t, c in zip(new['ts'], new['close']) if t < ts and c]
+                    ref_close = before[-1] if before else (prev_close or 0) * close_factor
+                    if ref_close:
+                        adj_factor *= 1 - value / ref_close
+
+        if not new_has:
+            adj_factor = close_factor
+        actions = []
+        if close_factor != 1.0:
+            actions.append(('split', close_factor))
+        if adj_factor != close_factor and _differs(adj_factor, close_factor):
+            actions.append(('dividend', adj_factor / close_factor))
+        # 只需調整新區間之前的 K 棒，重疊部分會由新資料取代
+        if actions or rebase is not None or old_has != new_has:
+            adj_factor = rebase if rebase is not None else adj_factor
+            closes, adj, volumes = old['close'], old['adj'], old['volume']
+            for i, ts in enumerate(old['ts']):
+                if ts >= first_new:
+                    break
+                if closes[i] is not None:
+                    closes[i] *= close_factor
+                if not new_has:
+                    adj[i] = closes[i]
+                elif adj[i] is not None:
+                    adj[i] *= adj_factor
+                if close_factor != 1.0 and volumes[i] is not None:
+                    volumes[i] = int(round(volumes[i] / close_factor))
+        return actions
+
+    def merge(self, symbol: str, new: dict, events=()) -> tuple:
+        """合併新抓取的 K 棒，回傳 (合併後的 bars, 偵測到的公司行動 [(類型, 係數)])；
+        新回應沒有任何 K 棒時原樣回傳（不以舊資料代替，由呼叫端略過該代碼）
+        """
+        if not new['ts']:
+            return new, []
+        old = self._bars.get(symbol)
+        actions = []
+        if old and old['ts']:
+            actions = self._adjust(old, new, events)
+            cut = next((i for i, ts in enumerate(old['ts']) if ts >= new['ts'][0]), len(old['ts']))
+            merged = {key: old[key][:cut] + new[key] for key in BAR_KEYS}
+        else:
+            merged = {key: list(new[key]) for key in BAR_KEYS}
+
+        start = merged['ts'][-1] - self.history_days * DAY
+        keep = next((i for i, ts in enumerate(merged['ts']) if ts >= start), 0)
+        if keep:
+            merged = {key: values[keep:] for key, values in merged.items()}
+        merged['hasAdj'] = new.get('hasAdj', True)
+        self._bars[symbol] = merged
+        self._dirty = True
+        if actions:
+            self.adjusted += 1
+        return merged, actions
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': STORE_VERSION, 'historyDays': self.history_days, 'symbols': self._bars},
+                      f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self._dirty = False
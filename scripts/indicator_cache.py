@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+技術指標記憶快取（僅使用 Python 標準庫）
+- 以 (代碼, 最後一根 K 棒時間, K 棒數量與內容雜湊, 指標參數) 作為指紋
+- 指紋相同時直接回傳上次計算的指標，省去 SMA/RSI/MACD/背離重算
+- 每檔代碼只保留最新一筆；任何輸入變動（新 K 棒、還原權值、指標計算參數）皆使指紋失效
+  （僅影響建議的門檻如 rsi_oversold / rsi_overbought 不列入指紋）
+- 以 LRU 限制筆數，寫檔採暫存檔 + os.replace，避免中斷時留下半份 JSON
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent / '.cache'
+# 指標演算法有變動時遞增，使舊快取全數失效
+CACHE_VERSION = 4
+
+
+def bars_fingerprint(symbol: str, timestamps: list, closes: list, volumes: list, params: dict) -> str:
+    """計算輸入指紋；params 只應包含指標計算實際使用的參數"""
+    h = hashlib.sha1()
+    h.update(json.dumps([closes, volumes], separators=(',', ':')).encode('utf-8'))
+    p = hashlib.sha1(json.dumps([CACHE_VERSION, params], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    last_ts = timestamps[-1] if timestamps else None
+    return f"{symbol}|{last_ts}|{len(closes)}|{h.hexdigest()[:16]}|{p}"
+
+
+class IndicatorCache:
+    """以代碼為單位的 LRU 指標快取"""
+
+    def __init__(self, path, max_entries=5000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != CACHE_VERSION:
+            return
+        for symbol, entry in data.get('entries', []):
+            self._entries[symbol] = entry
+
+    def get(self, symbol: str, fingerprint: str):
+        """指紋相符時回傳快取的指標 dict，否則回傳 None"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or entry['key'] != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(symbol)
+            self.hits += 1
+            return entry['value']
+
+    def put(self, symbol: str, fingerprint: str, value: dict):
+        with self._lock:
+            self._entries[symbol] = {'key': fingerprint, 'value': value}
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self):
+        """寫回快取檔（僅在有變動時）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {'version': CACHE_VERSION, 'entries': list(self._entries.items())}
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self._entries)
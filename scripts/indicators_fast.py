@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+技術指標的快速實作（僅使用 Python 標準庫）
+- 與 update_data_light.py 的參考實作（sma / rsi / macd / detect_divergence）語意相同，
+  浮點運算順序也相同，結果逐位元一致
+- macd：以單次走訪增量更新快慢 EMA，取代對每個前綴重算 EMA 的 O(n²) 寫法
+- rsi_series：一次產出背離偵測所需的逐日 RSI，取代對每個前綴呼叫 rsi()
+- 唯一刻意的差異：detect_divergence 略過 None 收盤價（參考實作遇到缺值會拋出 TypeError）
+- 各函式以 @timed 標記與參考實作相同的名稱（rsi / macd / detect_divergence …），剖析時 timers.json 直接對應
+
+正確性由 scripts/verify_indicators.py 以隨機與邊界序列對照參考實作驗證。
+"""
+
+from profiling import timed
+
+
+def _tail_valid(values, n):
+    """由尾端取最多 n 個非 None 值（維持原順序）"""
+    tail = values[-n:] if n else []
+    if len(tail) == n and None not in tail:
+        return tail
+    out = []
+    for v in reversed(values):
+        if v is not None:
+            out.append(v)
+            if len(out) == n:
+                break
+    out.reverse()
+    return out
+
+
+@timed('sma')
+def sma(values, period):
+    arr = _tail_valid(values, period)
+    if len(arr) < period:
+        return None
+    return sum(arr) / period
+
+
+def _rsi_of(arr, period):
+    """arr 為最後 period + 1 個有效收盤價"""
+    gains = []
+    losses = []
+    for i in range(1, len(arr)):
+        d = arr[i] - arr[i - 1]
+        gains.append(max(d, 0))
+        losses.append(max(-d, 0))
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+@timed('rsi')
+def rsi(values, period=14):
+    arr = _tail_valid(values, period + 1)
+    if len(arr) < period + 1:
+        return None
+    return _rsi_of(arr, period)
+
+
+@timed('rsi_series')
+def rsi_series(values, period=14, start=14):
+    """等同 [rsi(values[:i+1], period) for i in range(start, len(values))] 並略過 None 與 0"""
+    arr = []
+    out = []
+    for i, v in enumerate(values):
+        if v is not None:
+            arr.append(v)
+        if i < start or len(arr) < period + 1:
+            continue
+        r = _rsi_of(arr[-(period + 1):], period)
+        if r:
+            out.append(r)
+    return out
+
+
+@timed('macd')
+def macd(values, fast=12, slow=26, signal=9):
+    """回傳 (macd_line, signal_line, histogram)；單次走訪"""
+    arr = [v for v in values if v is not None]
+    n = len(arr)
+    if n < slow:
+        return None, None, None
+
+    k_fast = 2 / (fast + 1)
+    k_slow = 2 / (slow + 1)
+    ema_fast = sum(arr[:fast]) / fast
+    for price in arr[fast:slow]:
+        ema_fast = (price - ema_fast) * k_fast + ema_fast
+    ema_slow = sum(arr[:slow]) / slow
+    if n < slow + signal:
+        for price in arr[slow:]:
+            ema_fast = (price - ema_fast) * k_fast + ema_fast
+            ema_slow = (price - ema_slow) * k_slow + ema_slow
+        return ema_fast - ema_slow, None, None
+
+    # 參考實作的 MACD 序列由第 slow 根（0 起算）開始
+    macd_values = []
+    for price in arr[slow:]:
+        ema_fast = (price - ema_fast) * k_fast + ema_fast
+        ema_slow = (price - ema_slow) * k_slow + ema_slow
+        macd_values.append(ema_fast - ema_slow)
+    macd_line = macd_values[-1]
+
+    k_signal = 2 / (signal + 1)
+    signal_line = sum(macd_values[:signal]) / signal
+    for m in macd_values[signal:]:
+        signal_line = (m - signal_line) * k_signal + signal_line
+    histogram = (macd_line - signal_line) if signal_line else None
+    return macd_line, signal_line, histogram
+
+
+@timed('detect_divergence')
+def detect_divergence(prices, rsi_values):
+    """RSI 背離：'bullish' / 'bearish' / None；價格中的 None 會被略過"""
+    if None in prices:
+        prices = [p for p in prices if p is not None]
+    if len(prices) < 20 or len(rsi_values) < 20:
+        return None
+
+    recent_prices = prices[-20:]
+    recent_rsi = rsi_values[-20:]
+
+    low = min(recent_prices)
+    low_idx = recent_prices.index(low)
+    if low_idx > 10:
+        if low < min(recent_prices[:low_idx]) and min(recent_rsi) > min(recent_rsi[:low_idx]):
+            return 'bullish'
+
+    high = max(recent_prices)
+    high_idx = recent_prices.index(high)
+    if high_idx > 10:
+        if high > max(recent_prices[:high_idx]) and max(recent_rsi) < max(recent_rsi[:high_idx]):
+            return 'bearish'
+
+    return None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+增量 JSON 寫出（僅使用 Python 標準庫）
+- 先寫出開頭欄位（如 updatedAt），陣列元素逐筆序列化後立即寫入檔案，不在記憶體累積整份文件
+- 可同時寫入多個路徑（data.json 與歷史快照），每筆只序列化一次
+- 寫入暫存檔，完成後以 os.replace 原子替換；中途失敗時保留舊檔並刪除暫存檔
+
+輸出與 json.dump({**head, key: rows}, f, ensure_ascii=False, indent=indent) 逐位元組相同。
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+class JsonArrayWriter:
+    """以 {**head, key: [...]} 格式逐筆寫出 JSON 文件。
+
+    用法：
+        with JsonArrayWriter([path], {'updatedAt': ts}, 'stocks') as w:
+            for row in rows:
+                w.write(row)
+    """
+
+    def __init__(self, paths, head: dict, key: str = 'stocks', indent=2):
+        self.paths = [Path(p) for p in paths]
+        self.indent = indent
+        self.count = 0
+        self.closed = False
+        self._files = []
+        for path in self.paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._files.append(open(self._tmp(path), 'w', encoding='utf-8'))
+        if indent is None:
+            self._row_sep = ', '
+            self._row_pad = ''
+            parts = [f"{self._dumps(k)}: {self._dumps(v)}" for k, v in head.items()]
+            self._emit('{' + ''.join(p + ', ' for p in parts) + f"{self._dumps(key)}: [")
+        else:
+            pad = ' ' * indent
+            self._row_sep = ','
+            self._row_pad = '\n' + pad * 2
+            parts = [f"{pad}{self._dumps(k)}: {self._dumps(v).replace(chr(10), chr(10) + pad)}" for k, v in head.items()]
+            self._emit('{\n' + ''.join(p + ',\n' for p in parts) + f"{pad}{self._dumps(key)}: [")
+
+    @staticmethod
+    def _tmp(path: Path) -> Path:
+        return path.with_name(path.name + '.tmp')
+
+    def _dumps(self, value) -> str:
+        return json.dumps(value, ensure_ascii=False, indent=self.indent)
+
+    def _emit(self, text: str):
+        for f in self._files:
+            f.write(text)
+
+    def write(self, row):
+        """序列化並寫入一筆陣列元素"""
+        text = self._dumps(row)
+        if self.indent is not None:
+            text = text.replace('\n', self._row_pad)
+        self._emit((self._row_sep if self.count else '') + self._row_pad + text)
+        self.count += 1
+
+    def close(self):
+        """補上結尾並原子替換正式檔案"""
+        if self.closed:
+            return
+        if self.indent is None:
+            tail = ']}'
+        else:
+            tail = (f"\n{' ' * self.indent}]" if self.count else ']') + '\n}'
+        self._emit(tail)
+        for f, path in zip(self._files, self.paths):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            os.replace(self._tmp(path), path)
+        self.closed = True
+
+    def abort(self):
+        """放棄本次輸出：刪除暫存檔，正式檔案維持原狀"""
+        if self.closed:
+            return
+        for f, path in zip(self._files, self.paths):
+            f.close()
+            try:
+                os.remove(self._tmp(path))
+            except OSError:
+                pass
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
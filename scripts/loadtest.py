@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+本機壓力 / 浸泡測試工具（僅使用 Python 標準庫）
+- 啟動 Yahoo chart API 模擬伺服器：可設定延遲、429 限流機率，並統計上游呼叫次數
+- 預設同時啟動 api/stock.js 的行為模擬（/api/stock 代理 + public/ 靜態檔），
+  也可用 --target 指向 `vercel dev`（需設定 YAHOO_CHART_BASE 指向模擬伺服器）
+- 虛擬使用者依前端實際流量重播：開啟頁面、watchlist 逐檔更新、定時刷新 data.json、
+  搜尋（索引分片 + 即時查詢，含 .TW→.TWO 試探）、開啟詳細視窗（圖表與回測各抓一次 1y）
+- 報告吞吐量、各類請求延遲百分位數、錯誤率與上游放大倍率
+  （上游呼叫 / 用戶端 API 呼叫，以及上游呼叫 / 使用者查詢動作）
+
+使用方式：
+    python scripts/loadtest.py --users 50 --duration 60 --upstream-latency 120 --rate-limit 0.05
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, parse_qs, quote
+from urllib.request import urlopen, Request
+
+ROOT = Path(__file__).parent.parent
+PUBLIC_DIR = ROOT / 'public'
+CONFIG_PATH = Path(__file__).parent / 'config.json'
+
+# 前端行為常數（src/App.jsx、StockList.jsx、StockDetailModal.jsx）
+REFRESH_INTERVAL = 30.0
+WATCHLIST_SPACING = 0.5
+DETAIL_REQUESTS = 2
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class Metrics:
+    """執行緒安全的延遲與狀態碼統計"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+
+    def record(self, kind, status, seconds):
+        with self.lock:
+            self.latency[kind].append(seconds)
+            self.status[kind][status] += 1
+
+    def summary(self, elapsed):
+        out = {}
+        with self.lock:
+            for kind in sorted(self.latency):
+                values = sorted(self.latency[kind])
+                statuses = dict(self.status[kind])
+                errors = sum(n for code, n in statuses.items() if not (200 <= code < 400))
+                out[kind] = {
+                    'requests': len(values),
+                    'rps': round(len(values) / elapsed, 2) if elapsed else None,
+                    'p50_ms': round(percentile(values, 50) * 1000, 1),
+                    'p90_ms': round(percentile(values, 90) * 1000, 1),
+                    'p99_ms': round(percentile(values, 99) * 1000, 1),
+                    'max_ms': round(values[-1] * 1000, 1),
+                    'errorRate': round(errors / len(values), 4),
+                    'status': {str(k): v for k, v in sorted(statuses.items())},
+                }
+        return out
+
+
+# --- Yahoo chart API 模擬 ---
+
+class StubYahoo:
+    """模擬 /v8/finance/chart/{symbol}；未列在 known 中的代碼回 404（重現 .TW/.TWO 試探）"""
+
+    def __init__(self, known, latency_ms=100.0, jitter_ms=50.0, rate_limit=0.0, seed=0):
+        self.known = set(known)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.server = None
+
+    def _chart(self, symbol, days):
+        rng = random.Random(symbol)
+        p = rng.uniform(20, 800)
+        now = int(time.time()) // 86400 * 86400
+        ts, closes, vols = [], [], []
+        for i in range(days):
+            p *= 1 + rng.gauss(0, 0.02)
+            ts.append(now - (days - i) * 86400)
+            closes.append(round(p, 2))
+            vols.append(rng.randint(1000, 500000))
+        return {'chart': {'result': [{
+            'meta': {'symbol': symbol, 'gmtoffset': 28800, 'regularMarketPrice': closes[-1]},
+            'timestamp': ts,
+            'indicators': {'quote': [{'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': vols}]},
+        }], 'error': None}}
+
+    def handle(self, path):
+        """回傳 (status, body bytes)"""
+        parts = urlsplit(path)
+        symbol = parts.path.rsplit('/', 1)[-1]
+        qs = parse_qs(parts.query)
+        rng_days = {'1mo': 22, '3mo': 66, '6mo': 130, '1y': 250}
+        days = rng_days.get((qs.get('range') or ['1mo'])[0], 250)
+        with self.lock:
+            self.calls['total'] += 1
+            delay = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            limited = self.rng.random() < self.rate_limit
+        time.sleep(delay)
+        if limited:
+            with self.lock:
+                self.calls['429'] += 1
+            return 429, b'{"error":"Too Many Requests"}'
+        if symbol not in self.known:
+            with self.lock:
+                self.calls['404'] += 1
+            return 404, json.dumps({'chart': {'result': None, 'error': {'code': 'Not Found'}}}).encode()
+        return 200, json.dumps(self._chart(symbol, days)).encode()
+
+    def start(self, port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = stub.handle(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+
+
+# --- api/stock.js 與靜態檔模擬 ---
+
+class AppEmulator:
+    """重現 api/stock.js 的代理行為（逐筆轉發、照傳狀態碼）並提供 public/ 靜態檔"""
+
+    def __init__(self, upstream_base, public_dir=PUBLIC_DIR):
+        self.upstream_base = upstream_base
+        self.public_dir = Path(public_dir).resolve()
+        self.server = None
+
+    def _proxy(self, query):
+        qs = parse_qs(query)
+        symbol = (qs.get('symbol') or [None])[0]
+        if not symbol:
+            return 400, b'{"error":"Missing symbol parameter"}'
+        rng = (qs.get('range') or ['1mo'])[0]
+        interval = (qs.get('interval') or ['1d'])[0]
+        url = f"{self.upstream_base}/v8/finance/chart/{quote(symbol)}?interval={interval}&range={rng}"
+        try:
+            with urlopen(Request(url), timeout=30) as resp:
+                return 200, resp.read()
+        except HTTPError as e:
+            return e.code, json.dumps({'error': 'Failed to fetch stock data', 'status': e.code}).encode()
+
+    def _static(self, path):
+        target = (self.public_dir / path.lstrip('/')).resolve()
+        if self.public_dir not in target.parents or not target.is_file():
+            return 404, b'Not Found'
+        return 200, target.read_bytes()
+
+    def start(self, port=0):
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path == '/api/stock':
+                    status, body = app._proxy(parts.query)
+                else:
+                    status, body = app._static(parts.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+
+
+# --- 虛擬使用者 ---
+
+class VirtualUser:
+    """依前端行為發出請求；time_scale 用於壓縮等待時間（0.1 = 快 10 倍）"""
+
+    def __init__(self, base_url, metrics, watchlist, search_pool, rng, time_scale, counters):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+        self.metrics = metrics
+        self.watchlist = watchlist
+        self.search_pool = search_pool
+        self.rng = rng
+        self.time_scale = time_scale
+        self.counters = counters
+
+    def get(self, kind, path):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        t0 = time.perf_counter()
+        try:
+            self.conn.request('GET', path)
+            resp = self.conn.getresponse()
+            body = resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            status, body = 599, b''
+        self.metrics.record(kind, status, time.perf_counter() - t0)
+        if path.startswith('/api/'):
+            self.counters['api'].add()
+        return status, body
+
+    def sleep(self, seconds):
+        time.sleep(seconds * self.time_scale)
+
+    def live_stock(self, kind, code):
+        """重現 fetchLiveStock()：先查索引分片，索引沒有時 .TW 失敗再試 .TWO"""
+        self.counters['lookups'].add()
+        if '.' in code:
+            return self.get(kind, f"/api/stock?symbol={quote(code)}")
+        ch = code[0].lower()
+        shard = f"c{ch}" if ch.isascii() and ch.isalnum() else f"h{ord(ch) % 64:02x}"
+        status, body = self.get('search-shard', f"/search/{shard}.json")
+        if status == 200:
+            hit = (json.loads(body).get('codes') or {}).get(code.upper())
+            if hit:
+                return self.get(kind, f"/api/stock?symbol={quote(code.upper())}.{hit[0]}")
+        status, body = self.get(kind, f"/api/stock?symbol={quote(code.upper())}.TW")
+        if status != 200:
+            status, body = self.get(kind, f"/api/stock?symbol={quote(code.upper())}.TWO")
+        return status, body
+
+    def startup(self):
+        self.get('data.json', f"/data.json?ts={int(time.time() * 1000)}")
+        for symbol in self.watchlist:
+            self.live_stock('watchlist-refresh', symbol)
+            self.sleep(WATCHLIST_SPACING)
+
+    def search(self):
+        code = self.rng.choice(self.search_pool)
+        self.live_stock('search', code)
+
+    def open_detail(self):
+        symbol = self.rng.choice(self.watchlist)
+        self.counters['lookups'].add()
+        for _ in range(DETAIL_REQUESTS):
+            self.get('detail-modal', f"/api/stock?symbol={quote(symbol)}&range=1y&interval=1d")
+
+    def run(self, deadline, weights):
+        self.startup()
+        next_refresh = time.time() + REFRESH_INTERVAL * self.time_scale
+        actions = [a for a, w in weights.items() for _ in range(w)]
+        while time.time() < deadline:
+            if time.time() >= next_refresh:
+                self.get('data.json', f"/data.json?ts={int(time.time() * 1000)}")
+                next_refresh += REFRESH_INTERVAL * self.time_scale
+            action = self.rng.choice(actions) if actions else 'idle'
+            if action == 'search':
+                self.search()
+            elif action == 'detail':
+                self.open_detail()
+            self.sleep(self.rng.expovariate(1 / 5.0))
+        if self.conn:
+            self.conn.close()
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def add(self):
+        with self.lock:
+            self.value += 1
+
+
+def load_symbols():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        watchlist = json.load(f).get('watchlist', [])
+    try:
+        with open(PUBLIC_DIR / 'names.json', 'r', encoding='utf-8') as f:
+            names = json.load(f)
+    except (OSError, ValueError):
+        names = {}
+    return watchlist, names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='本機壓力 / 浸泡測試（Yahoo 模擬上游）')
+    parser.add_argument('--users', type=int, default=20, help='同時在線的虛擬使用者數')
+    parser.add_argument('--duration', type=float, default=30.0, help='測試秒數（浸泡測試可設數小時）')
+    parser.add_argument('--ramp', type=float, default=5.0, help='在幾秒內逐步啟動全部使用者')
+    parser.add_argument('--time-scale', type=float, default=0.1, help='等待時間壓縮倍率（1 = 真實節奏）')
+    parser.add_argument('--upstream-latency', type=float, default=120.0, help='模擬上游平均延遲（毫秒）')
+    parser.add_argument('--upstream-jitter', type=float, default=40.0, help='模擬上游延遲標準差（毫秒）')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='上游回 429 的機率（0~1）')
+    parser.add_argument('--weights', default='search=3,detail=1,idle=4', help='使用者行為權重')
+    parser.add_argument('--target', default=None,
+                        help='測試既有伺服器（如 vercel dev）；未指定時使用內建 api/stock.js 模擬')
+    parser.add_argument('--stub-port', type=int, default=0, help='模擬上游埠號（搭配 --target 時固定埠號較方便）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='另存 JSON 報告路徑')
+    args = parser.parse_args(argv)
+
+    watchlist, names = load_symbols()
+    known = set(watchlist) | set(names)
+    codes = sorted({s.split('.')[0] for s in known})
+    weights = {k: int(v) for k, v in (kv.split('=') for kv in args.weights.split(','))}
+
+    stub = StubYahoo(known, args.upstream_latency, args.upstream_jitter, args.rate_limit, args.seed)
+    stub_url = stub.start(args.stub_port)
+    app = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+        print(f"🎯 目標：{base_url}（請以 YAHOO_CHART_BASE={stub_url} 啟動）")
+    else:
+        app = AppEmulator(stub_url)
+        base_url = app.start()
+        print(f"🎯 目標：內建模擬 {base_url}（上游模擬 {stub_url}）")
+
+    metrics = Metrics()
+    counters = {'api': Counter(), 'lookups': Counter()}
+    master = random.Random(args.seed)
+    deadline = time.time() + args.ramp + args.duration
+    threads = []
+    t_start = time.time()
+    for n in range(args.users):
+        user = VirtualUser(base_url, metrics, watchlist, codes, random.Random(master.random()),
+                           args.time_scale, counters)
+        t = threading.Thread(target=user.run, args=(deadline, weights), daemon=True)
+        t.start()
+        threads.append(t)
+        if args.users > 1:
+            time.sleep(args.ramp / args.users)
+    for t in threads:
+        t.join()
+    elapsed = time.time() - t_start
+
+    stub.stop()
+    if app:
+        app.stop()
+
+    summary = metrics.summary(elapsed)
+    upstream = dict(stub.calls)
+    report = {
+        'config': vars(args),
+        'elapsed_s': round(elapsed, 2),
+        'totalRequests': sum(v['requests'] for v in summary.values()),
+        'clientApiCalls': counters['api'].value,
+        'lookups': counters['lookups'].value,
+        'upstreamCalls': upstream.get('total', 0),
+        'upstream429': upstream.get('429', 0),
+        'upstream404': upstream.get('404', 0),
+        'amplification': round(upstream.get('total', 0) / counters['api'].value, 3) if counters['api'].value else None,
+        'upstreamPerLookup': round(upstream.get('total', 0) / counters['lookups'].value, 3) if counters['lookups'].value else None,
+        'endpoints': summary,
+    }
+
+    print(f"\n⏱️ {elapsed:.1f}s，{args.users} 位使用者，共 {report['totalRequests']} 個請求"
+          f"（{report['totalRequests'] / elapsed:.1f} req/s）")
+    print(f"{'類型':<20}{'請求':>8}{'req/s':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'錯誤率':>8}")
+    for kind, s in summary.items():
+        print(f"{kind:<20}{s['requests']:>8}{s['rps']:>8}{s['p50_ms']:>9}{s['p90_ms']:>9}{s['p99_ms']:>9}{s['errorRate']:>8.2%}")
+    print(f"\n🔁 上游呼叫 {report['upstreamCalls']} 次（429：{report['upstream429']}、404：{report['upstream404']}），"
+          f"用戶端 API 呼叫 {report['clientApiCalls']} 次，放大倍率 {report['amplification']}，"
+          f"每次查詢動作 {report['upstreamPerLookup']} 次上游呼叫")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 已儲存報告至 {args.json}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+串流式多階段處理管線（僅使用 Python 標準庫）
+- 各階段（抓取 → 解析/指標/建議 → 寫出）以有界 queue.Queue 相接，佇列滿時上游阻塞（背壓）
+- 每個階段可有多個執行緒：網路抓取以多執行緒重疊等待，計算階段在等待期間持續進行
+- 以滑動視窗（Semaphore）限制同時在途的項目數，輸出端依原順序重排，記憶體與清單長度無關
+- 單一項目失敗只會跳過該項（以 None 往下傳遞），不影響其他項目
+- serial=True 時於呼叫端執行緒依序處理（cProfile 僅剖析主執行緒時使用）
+
+使用方式：
+    pipe = Pipeline([('fetch', fetch, 4), ('compute', compute, 1)], queue_size=32, window=64)
+    stats = pipe.run(items, sink)
+"""
+
+import queue
+import threading
+from time import perf_counter
+
+_STOP = object()
+
+
+class _StageStats:
+    __slots__ = ('items', 'dropped', 'busy', 'blocked')
+
+    def __init__(self):
+        self.items = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def to_dict(self):
+        return {
+            'items': self.items,
+            'dropped': self.dropped,
+            'busySeconds': round(self.busy, 3),
+            'blockedSeconds': round(self.blocked, 3),
+        }
+
+
+class Pipeline:
+    """stages: [(名稱, 函式, 執行緒數)]；函式接收上一階段的輸出，回傳 None 表示略過該項"""
+
+    def __init__(self, stages, queue_size=32, window=64, on_error=None):
+        if not stages:
+            raise ValueError("至少需要一個階段")
+        self.stages = [(name, fn, max(1, int(workers))) for name, fn, workers in stages]
+        self.queue_size = max(1, int(queue_size))
+        self.window = max(1, int(window))
+        self.on_error = on_error
+        self.stats = {name: _StageStats() for name, _, _ in self.stages}
+        self._lock = threading.Lock()
+
+    def _apply(self, name, fn, value):
+        """執行單一階段；例外交由 on_error 處理並回傳 None"""
+        st = self.stats[name]
+        t0 = perf_counter()
+        try:
+            out = fn(value)
+        except Exception as e:
+            out = None
+            if self.on_error:
+                self.on_error(name, value, e)
+        elapsed = perf_counter() - t0
+        with self._lock:
+            st.items += 1
+            st.busy += elapsed
+            if out is None:
+                st.dropped += 1
+        return out
+
+    def _put(self, q, item, st):
+        t0 = perf_counter()
+        q.put(item)
+        elapsed = perf_counter() - t0
+        if elapsed > 1e-4:
+            with self._lock:
+                st.blocked += elapsed
+
+    def _worker(self, name, fn, inbox, outbox, remaining):
+        st = self.stats[name]
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                # 本階段最後一個結束的執行緒負責通知下游
+                with self._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(remaining[1]):
+                        outbox.put(_STOP)
+                return
+            seq, value = item
+            if value is not None:
+                value = self._apply(name, fn, value)
+            self._put(outbox, (seq, value), st)
+
+    def run_serial(self, items, sink):
+        for seq, value in enumerate(items):
+            for name, fn, _ in self.stages:
+                if value is None:
+                    break
+                value = self._apply(name, fn, value)
+            sink(seq, value)
+        return self.summary()
+
+    def run(self, items, sink, serial=False) -> dict:
+        """處理 items，依原順序呼叫 sink(序號, 最終輸出或 None)；回傳各階段統計"""
+        if serial:
+            return self.run_serial(items, sink)
+
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        slots = threading.Semaphore(self.window)
+        feeder_error = []
+        threads = []
+        for k, (name, fn, workers) in enumerate(self.stages):
+            downstream = self.stages[k + 1][2] if k + 1 < len(self.stages) else 1
+            remaining = [workers, downstream]
+            for _ in range(workers):
+                t = threading.Thread(target=self._worker, args=(name, fn, queues[k], queues[k + 1], remaining),
+                                     name=f"pipeline-{name}", daemon=True)
+                t.start()
+                threads.append(t)
+
+        def feed():
+            try:
+                for seq, value in enumerate(items):
+                    slots.acquire()
+                    queues[0].put((seq, value))
+            except Exception as e:
+                feeder_error.append(e)
+            finally:
+                for _ in range(self.stages[0][2]):
+                    queues[0].put(_STOP)
+
+        feeder = threading.Thread(target=feed, name='pipeline-feed', daemon=True)
+        feeder.start()
+
+        # 輸出端：依序號重排，視窗保證暫存數量不超過 window
+        pending = {}
+        expected = 0
+        out = queues[-1]
+        while True:
+            item = out.get()
+            if item is _STOP:
+                break
+            seq, value = item
+            pending[seq] = value
+            while expected in pending:
+                sink(expected, pending.pop(expected))
+                expected += 1
+                slots.release()
+        feeder.join()
+        for t in threads:
+            t.join()
+        if feeder_error:
+            raise feeder_error[0]
+        return self.summary()
+
+    def summary(self) -> dict:
+        return {name: st.to_dict() for name, st in self.stats.items()}
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+效能剖析工具（僅使用 Python 標準庫）
+- cProfile：整體函式呼叫統計，輸出 pstats 檔與文字摘要
+- tracemalloc：記憶體配置熱點（依程式行彙總）
+- @timed：低開銷的熱點函式計時器，停用時僅多一次旗標判斷
+- 以 @timed 呼叫堆疊彙總自身耗時，輸出 flamegraph 可讀的 collapsed-stack 檔
+
+使用方式：
+    with profile_session(out_dir, profile=True, trace_memory=True):
+        run()
+"""
+
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+# label -> [呼叫次數, 總耗時, 自身耗時]
+_stats = {}
+# 'a;b;c' -> 自身耗時（秒）
+_collapsed = {}
+
+
+def timed(name=None):
+    """熱點函式計時裝飾器。
+    未啟用剖析時直接呼叫原函式；啟用時記錄呼叫次數、總耗時與自身耗時，
+    並以目前 @timed 呼叫鏈作為 collapsed-stack 的鍵。
+    """
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+                _local.child = []
+            child = _local.child
+            stack.append(label)
+            child.append(0.0)
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - t0
+                self_time = elapsed - child.pop()
+                key = ';'.join(stack)
+                stack.pop()
+                if child:
+                    child[-1] += elapsed
+                with _lock:
+                    st = _stats.get(label)
+                    if st is None:
+                        st = _stats[label] = [0, 0.0, 0.0]
+                    st[0] += 1
+                    st[1] += elapsed
+                    st[2] += self_time
+                    _collapsed[key] = _collapsed.get(key, 0.0) + self_time
+        return wrapper
+    return deco
+
+
+def reset_timers():
+    """清空計時統計"""
+    with _lock:
+        _stats.clear()
+        _collapsed.clear()
+
+
+def timer_report() -> list:
+    """回傳依總耗時排序的計時摘要：list[dict]"""
+    with _lock:
+        items = [(label, st[0], st[1], st[2]) for label, st in _stats.items()]
+    items.sort(key=lambda x: x[2], reverse=True)
+    return [
+        {
+            'function': label,
+            'calls': calls,
+            'total_s': round(total, 6),
+            'self_s': round(self_time, 6),
+            'per_call_us': round(total / calls * 1e6, 2) if calls else 0.0,
+        }
+        for label, calls, total, self_time in items
+    ]
+
+
+def write_collapsed(path: Path):
+    """輸出 collapsed-stack 格式（每行 `a;b;c <微秒>`），可直接餵給 flamegraph.pl / speedscope"""
+    with _lock:
+        items = sorted(_collapsed.items())
+    with open(path, 'w', encoding='utf-8') as f:
+        for key, seconds in items:
+            us = int(round(seconds * 1e6))
+            if us > 0:
+                f.write(f"{key} {us}\n")
+
+
+@contextmanager
+def profile_session(out_dir, profile=False, trace_memory=False, top=30):
+    """包住整個執行流程的剖析區段。
+    profile: 啟用 cProfile 與 @timed 計時
+    trace_memory: 啟用 tracemalloc
+    結束時將報告寫入 out_dir：
+    - profile.pstats / profile.txt：cProfile 原始檔與累計耗時前 N 名
+    - timers.json：@timed 熱點函式統計
+    - profile.collapsed：flamegraph collapsed-stack
+    - memory.txt：配置量前 N 名的程式行與峰值
+    """
+    global _enabled
+    if not profile and not trace_memory:
+        yield
+        return
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    profiler = None
+    if profile:
+        reset_timers()
+        _enabled = True
+        profiler = cProfile.Profile()
+    if trace_memory:
+        tracemalloc.start(25)
+    t0 = perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = perf_counter() - t0
+        _enabled = False
+
+        # 先取記憶體快照並停止追蹤，避免把下方寫出 cProfile 報告的配置算進去
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        if profiler:
+            profiler.dump_stats(str(out_dir / 'profile.pstats'))
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats('cumulative').print_stats(top)
+            (out_dir / 'profile.txt').write_text(buf.getvalue(), encoding='utf-8')
+            with open(out_dir / 'timers.json', 'w', encoding='utf-8') as f:
+                json.dump({'wall_s': round(wall, 6), 'timers': timer_report()}, f, ensure_ascii=False, indent=2)
+            write_collapsed(out_dir / 'profile.collapsed')
+
+        if trace_memory:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, pstats.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            lines = [
+                f"current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB",
+                '',
+                f"Top {top} allocations by line:",
+            ]
+            for i, stat in enumerate(snapshot.statistics('lineno')[:top], 1):
+                frame = stat.traceback[0]
+                lines.append(f"#{i}: {frame.filename}:{frame.lineno} {stat.size / 1024:.1f} KiB ({stat.count} blocks)")
+            (out_dir / 'memory.txt').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        print(f"🔬 效能報告已輸出至 {out_dir}（耗時 {wall:.2f}s）")
+
+
+def add_profile_arguments(parser, default_dir):
+    """為 argparse 加入共用的剖析參數"""
+    parser.add_argument('--profile', action='store_true',
+                        help='以 cProfile 與熱點計時器剖析執行流程')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='以 tracemalloc 追蹤記憶體配置')
+    parser.add_argument('--profile-dir', default=str(default_dir),
+                        help=f'效能報告輸出目錄（預設 {default_dir}）')
+    return parser
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+投資組合風險分析（僅使用 Python 標準庫）
+- 由每檔股票的日 K 收盤價計算日報酬，依日期對齊成報酬矩陣
+- 以 EWMA（RiskMetrics，λ 預設 0.94）逐日增量更新全市場共變異數矩陣
+  下三角以 float32（array('f')）緊湊存放，新增代碼只需在尾端追加一列
+  衰減以全域縮放係數處理，每日更新僅需累加當日報酬外積
+- 權重與最後更新日依代碼分別記錄：新加入或前次抓取失敗的代碼，以本次取得的報酬補入
+  模型已處理過的交易日（依當日距今的衰減係數），共變異數以兩檔各自的權重正規化
+- 查詢時對子矩陣套用常數相關係數收縮（shrinkage），回傳波動度、Beta、VaR 與風險貢獻
+- 模型存於 .cache/risk/，每日只需增量更新；僅公開 watchlist 與基準的子矩陣（public/risk.json）
+- 共變異數寫入以世代編號命名的 cov-{世代}.f32，meta.json 記錄世代與 CRC32 並最後以 os.replace 替換；
+  中途中斷時 meta.json 仍指向上一份完整的 cov 檔，載入時世代或檢查碼不符即視為無效
+"""
+
+import json
+import math
+import os
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).parent.parent / '.cache' / 'risk'
+RISK_PATH = Path(__file__).parent.parent / 'public' / 'risk.json'
+TRADING_DAYS = 252
+Z_SCORES = {'95': 1.6449, '99': 2.3263}
+MODEL_VERSION = 3
+# 保留最近處理過的交易日，直到其衰減係數低於此值（供回補時計算距今天數）
+DATE_HORIZON = 1e-6
+
+
+def daily_returns(timestamps, closes, utc_offset=0) -> dict:
+    """回傳 {YYYY-MM-DD: 相對前一個有效收盤價的報酬率}"""
+    tz = timezone(timedelta(seconds=utc_offset))
+    out = {}
+    prev = None
+    for ts, c in zip(timestamps, closes):
+        if c is None:
+            continue
+        if prev:
+            day = datetime.fromtimestamp(ts, tz).strftime('%Y-%m-%d')
+            out[day] = c / prev - 1
+        prev = c
+    return out
+
+
+def _tri(i, j):
+    """下三角緊湊索引（需 j <= i）"""
+    return i * (i + 1) // 2 + j
+
+
+class RiskModel:
+    """EWMA 共變異數模型；實際共變異數 = cov[i, j] / sqrt(weights[i] * weights[j])
+    cov 與 weights 同樣以全域 scale 縮放存放，正規化時縮放係數互相抵銷
+    """
+
+    def __init__(self, decay=0.94):
+        self.decay = decay
+        self.symbols = []
+        self.index = {}
+        self.cov = array('f')
+        self.weights = array('d')
+        self.last_dates = []
+        self.dates = []
+        self.scale = 1.0
+        self.last_date = None
+        self.mean_corr = 0.0
+        self.generation = 0
+
+    # --- 增量更新 ---
+
+    def _add_symbol(self, symbol):
+        i = len(self.symbols)
+        self.symbols.append(symbol)
+        self.index[symbol] = i
+        self.cov.extend(array('f', bytes(4 * (i + 1))))
+        self.weights.append(0.0)
+        self.last_dates.append(None)
+
+    def _rescale(self):
+        s = self.scale
+        cov = self.cov
+        for k in range(len(cov)):
+            cov[k] *= s
+        weights = self.weights
+        for k in range(len(weights)):
+            weights[k] *= s
+        self.scale = 1.0
+
+    def _max_dates(self) -> int:
+        if not 0 < self.decay < 1:
+            return 1
+        return max(1, math.ceil(math.log(DATE_HORIZON) / math.log(self.decay)))
+
+    def update(self, date: str, returns: dict) -> bool:
+        """加入一個交易日的報酬 {代碼: 報酬}；已處理過的日期略過（改由 backfill 補入缺漏的代碼）"""
+        if self.last_date and date <= self.last_date:
+            return False
+        for symbol in returns:
+            if symbol not in self.index:
+                self._add_symbol(symbol)
+        self.scale *= self.decay
+        k = (1 - self.decay) / self.scale
+        weights, last_dates = self.weights, self.last_dates
+        for symbol in returns:
+            i = self.index[symbol]
+            weights[i] += k
+            last_dates[i] = date
+        items = sorted((self.index[s], r) for s, r in returns.items() if r)
+        cov = self.cov
+        for a, (i, ri) in enumerate(items):
+            base = i * (i + 1) // 2
+            kri = k * ri
+            for j, rj in items[:a + 1]:
+                cov[base + j] += kri * rj
+        if self.scale < 1e-12:
+            self._rescale()
+        self.last_date = date
+        self.dates.append(date)
+        del self.dates[:-self._max_dates()]
+        return True
+
+    def backfill(self, date: str, returns: dict) -> int:
+        """補入模型已處理過的交易日 date 上尚未套用的代碼（新代碼或先前抓取失敗者）。
+        以 date 距今的衰減係數加權，累加這些代碼的變異數與其和當日其他代碼的共變異數；
+        date 已超出保留的交易日範圍時略過。回傳補入的代碼數
+        """
+        try:
+            age = len(self.dates) - 1 - self.dates.index(date)
+        except ValueError:
+            return 0
+        late = [s for s in returns if s not in self.index or (self.last_dates[self.index[s]] or '') < date]
+        if not late:
+            return 0
+        for symbol in late:
+            if symbol not in self.index:
+                self._add_symbol(symbol)
+        k = (1 - self.decay) * self.decay ** age / self.scale
+        late_idx = set()
+        for symbol in late:
+            i = self.index[symbol]
+            self.weights[i] += k
+            self.last_dates[i] = date
+            late_idx.add(i)
+        items = sorted((self.index[s], r) for s, r in returns.items() if r)
+        cov = self.cov
+        # 補入代碼與當日全部代碼的外積；兩者皆為補入代碼時只累加一次
+        for i, ri in items:
+            if i not in late_idx:
+                continue
+            kri = k * ri
+            for j, rj in items:
+                if j in late_idx and j > i:
+                    continue
+                cov[_tri(i, j) if j <= i else _tri(j, i)] += kri * rj
+        return len(late)
+
+    def update_many(self, returns_by_symbol: dict) -> tuple:
+        """依日期順序套用 {代碼: {日期: 報酬}}。
+        模型已處理過的日期改為回補缺漏的代碼；回傳 (新處理的交易日數, 回補的代碼-日數)
+        """
+        by_date = {}
+        for symbol, series in returns_by_symbol.items():
+            for day, r in series.items():
+                by_date.setdefault(day, {})[symbol] = r
+        days = filled = 0
+        for day in sorted(by_date):
+            if self.last_date and day <= self.last_date:
+                filled += self.backfill(day, by_date[day])
+            elif self.update(day, by_date[day]):
+                days += 1
+        return days, filled
+
+    def refresh(self):
+        """重新計算全市場平均相關係數（收縮目標）"""
+        n = len(self.symbols)
+        sd = [math.sqrt(max(self._raw(i, i), 0.0)) for i in range(n)]
+        total = 0.0
+        count = 0
+        cov = self.cov
+        for i in range(n):
+            if not sd[i]:
+                continue
+            base = i * (i + 1) // 2
+            for j in range(i):
+                if sd[j]:
+                    total += cov[base + j] / (sd[i] * sd[j])
+                    count += 1
+        self.mean_corr = total / count if count else 0.0
+
+    # --- 查詢 ---
+
+    def _raw(self, i, j):
+        return self.cov[_tri(i, j) if j <= i else _tri(j, i)]
+
+    def _norm(self, i, j):
+        w = math.sqrt(self.weights[i] * self.weights[j])
+        return 1 / w if w else 0.0
+
+    def covariance(self, a: str, b: str) -> float:
+        i, j = self.index[a], self.index[b]
+        return self._raw(i, j) * self._norm(i, j)
+
+    def submatrix(self, symbols, shrinkage=0.0) -> list:
+        """回傳 symbols 的共變異數子矩陣（list[list[float]]），對非對角元素套用常數相關收縮"""
+        idx = [self.index[s] for s in symbols]
+        var = [self._raw(i, i) * self._norm(i, i) for i in idx]
+        n = len(idx)
+        out = [[0.0] * n for _ in range(n)]
+        for a in range(n):
+            out[a][a] = var[a]
+            for b in range(a):
+                sample = self._raw(idx[a], idx[b]) * self._norm(idx[a], idx[b])
+                target = self.mean_corr * math.sqrt(var[a] * var[b])
+                out[a][b] = out[b][a] = (1 - shrinkage) * sample + shrinkage * target
+        return out
+
+    def portfolio_risk(self, holdings: dict, benchmark=None, shrinkage=0.0) -> dict:
+        """計算投資組合風險。
+        holdings: {代碼: 市值}（或任意比例的權重）
+        回傳日/年化波動度、1 日參數法 VaR（95/99%，以市值計）、相對基準的 Beta、
+        各持股風險貢獻與相關係數矩陣。模型中沒有的代碼列於 missing。
+        """
+        known = [s for s, v in holdings.items() if s in self.index and v]
+        missing = [s for s in holdings if s not in self.index]
+        total = sum(holdings[s] for s in known)
+        if not known or not total or not self.last_date:
+            return {'symbols': known, 'missing': missing, 'volatility': None}
+
+        symbols = list(known)
+        has_bench = benchmark in self.index and benchmark not in known
+        if has_bench:
+            symbols.append(benchmark)
+        cov = self.submatrix(symbols, shrinkage)
+        n = len(known)
+        w = [holdings[s] / total for s in known]
+        cw = [sum(cov[i][j] * w[j] for j in range(n)) for i in range(n)]
+        var_p = sum(w[i] * cw[i] for i in range(n))
+        vol = math.sqrt(max(var_p, 0.0))
+
+        beta = None
+        b = symbols.index(benchmark) if benchmark in symbols else None
+        if b is not None and cov[b][b]:
+            beta = sum(w[i] * cov[i][b] for i in range(n)) / cov[b][b]
+
+        sd = [math.sqrt(cov[i][i]) for i in range(n)]
+        corr = [[(cov[i][j] / (sd[i] * sd[j]) if sd[i] and sd[j] else 0.0) for j in range(n)] for i in range(n)]
+        return {
+            'symbols': known,
+            'missing': missing,
+            'weights': w,
+            'volatility': vol,
+            'annualVolatility': vol * math.sqrt(TRADING_DAYS),
+            'var': {level: z * vol * total for level, z in Z_SCORES.items()},
+            'beta': beta,
+            'riskContribution': [w[i] * cw[i] / var_p if var_p else 0.0 for i in range(n)],
+            'correlation': corr,
+        }
+
+    # --- 存取 ---
+
+    @staticmethod
+    def _cov_path(model_dir, generation) -> Path:
+        return Path(model_dir) / f"cov-{generation}.f32"
+
+    def save(self, model_dir=MODEL_DIR):
+        """先寫出新世代的 cov 檔，再以 os.replace 原子替換 meta.json，最後刪除舊世代的 cov 檔"""
+        model_dir = Path(model_dir)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        generation = self.generation + 1
+        data = self.cov.tobytes()
+        cov_path = self._cov_path(model_dir, generation)
+        tmp = cov_path.with_name(cov_path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, cov_path)
+        meta = {
+            'version': MODEL_VERSION,
+            'generation': generation,
+            'covChecksum': zlib.crc32(data),
+            'decay': self.decay,
+            'symbols': self.symbols,
+            'scale': self.scale,
+            'weights': list(self.weights),
+            'lastDates': self.last_dates,
+            'dates': self.dates,
+            'lastDate': self.last_date,
+            'meanCorr': self.mean_corr,
+        }
+        tmp = model_dir / 'meta.json.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, model_dir / 'meta.json')
+        self.generation = generation
+        for stale in model_dir.glob('cov*.f32'):
+            if stale != cov_path:
+                stale.unlink()
+
+    @classmethod
+    def load(cls, model_dir=MODEL_DIR, decay=0.94):
+        """載入既有模型；不存在、版本或 λ 不符、cov 檔與 meta.json 的世代或檢查碼不一致時回傳空模型"""
+        model = cls(decay)
+        model_dir = Path(model_dir)
+        try:
+            with open(model_dir / 'meta.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != MODEL_VERSION or meta.get('decay') != decay:
+                return model
+            with open(cls._cov_path(model_dir, meta['generation']), 'rb') as f:
+                data = f.read()
+        except (OSError, ValueError, KeyError):
+            return model
+        if zlib.crc32(data) != meta.get('covChecksum'):
+            return model
+        cov = array('f')
+        cov.frombytes(data[:len(data) - len(data) % cov.itemsize])
+        n = len(meta['symbols'])
+        if len(cov) != n * (n + 1) // 2 or len(meta['weights']) != n or len(meta['lastDates']) != n:
+            return model
+        model.symbols = meta['symbols']
+        model.index = {s: i for i, s in enumerate(model.symbols)}
+        model.cov = cov
+        model.scale = meta['scale']
+        model.weights = array('d', meta['weights'])
+        model.last_dates = meta['lastDates']
+        model.dates = meta['dates']
+        model.last_date = meta['lastDate']
+        model.mean_corr = meta.get('meanCorr', 0.0)
+        model.generation = meta['generation']
+        return model
+
+
+def write_risk(model: RiskModel, symbols, updated_at: str, benchmark=None, shrinkage=0.0, path=RISK_PATH) -> list:
+    """僅公開指定代碼（與基準）的收縮後子矩陣，回傳實際輸出的代碼"""
+    symbols = [s for s in dict.fromkeys(list(symbols) + ([benchmark] if benchmark else [])) if s in model.index]
+    cov = model.submatrix(symbols, shrinkage) if model.last_date else []
+    n = len(symbols)
+    sd = [math.sqrt(cov[i][i]) for i in range(n)]
+    b = symbols.index(benchmark) if benchmark in symbols else None
+    payload = {
+        'updatedAt': updated_at,
+        'asOf': model.last_date,
+        'benchmark': benchmark,
+        'shrinkage': shrinkage,
+        'symbols': symbols,
+        'annualVolatility': [round(x * math.sqrt(TRADING_DAYS), 4) for x in sd],
+        'beta': [round(cov[i][b] / cov[b][b], 4) if b is not None and cov[b][b] else None for i in range(n)],
+        'covariance': [[float(f"{v:.6g}") for v in row] for row in cov],
+        'correlation': [[round(cov[i][j] / (sd[i] * sd[j]), 4) if sd[i] and sd[j] else 0.0 for j in range(n)] for i in range(n)],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    return symbols
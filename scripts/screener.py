@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+選股查詢引擎（僅使用 Python 標準庫）
+- 將最新快照（public/data.json）載入欄式儲存，數值欄位建立排序索引，類別欄位建立反向索引
+- 複合條件以 bisect 區間掃描取候選集合，以最小者為基底逐列過濾其餘條件；排序取前 N 名使用 heap
+- 每日執行時預先計算常用選股結果，輸出 public/screens.json
+
+使用方式：
+    python scripts/screener.py "rsi < 30 and volumeTrend = increasing and sector = 半導體業" --by confidence --top 50
+"""
+
+import argparse
+import heapq
+import json
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+DATA_PATH = Path(__file__).parent.parent / 'public' / 'data.json'
+SCREENS_PATH = Path(__file__).parent.parent / 'public' / 'screens.json'
+
+
+def _field(name, *path):
+    """欄位取值函式：dict（data.json 的單筆結果）依巢狀路徑取值，
+    StockRow（universe_state.py 的欄式儲存列）直接讀取同名屬性，不需還原成 dict
+    """
+    path = path or (name,)
+
+    def get(s):
+        if not isinstance(s, dict):
+            return getattr(s, name)
+        for key in path[:-1]:
+            s = s.get(key) or {}
+        return s.get(path[-1])
+    return get
+
+
+def _indicator(name):
+    return _field(name, 'indicators', name)
+
+
+def _recommendation(name):
+    return _field(name, 'recommendation', name)
+
+
+_sma5 = _indicator('sma5')
+_sma20 = _indicator('sma20')
+_signals = _recommendation('signals')
+
+
+def _sma_spread(s):
+    sma5, sma20 = _sma5(s), _sma20(s)
+    if sma5 is None or not sma20:
+        return None
+    return (sma5 - sma20) / sma20 * 100
+
+
+# 數值欄位：建立排序索引，支援 < <= > >= = 與 between
+NUMERIC_FIELDS = {
+    'price': _field('price'),
+    'change': _field('change'),
+    'changePercent': _field('changePercent'),
+    'volume': _field('volume'),
+    'rsi': _indicator('rsi'),
+    'sma5': _sma5,
+    'sma20': _sma20,
+    'smaSpread': _sma_spread,
+    'macdHistogram': _indicator('macdHistogram'),
+    'confidence': _recommendation('confidence'),
+}
+
+# 類別欄位：反向索引，支援 = 與 in
+CATEGORY_FIELDS = {
+    'symbol': _field('symbol'),
+    'sector': _field('sector'),
+    'action': _recommendation('action'),
+    'volumeTrend': _indicator('volumeTrend'),
+}
+
+# 多值欄位：反向索引，支援 has
+MULTI_FIELDS = {
+    'signals': lambda s: _signals(s) or [],
+}
+
+# 每日預先計算的常用選股：名稱 -> (條件, 排序欄位, 筆數, 是否遞減)
+STANDARD_SCREENS = {
+    'oversold': ([('rsi', '<', 30)], 'rsi', 50, False),
+    'overbought': ([('rsi', '>', 70)], 'rsi', 50, True),
+    'oversoldVolumeUp': ([('rsi', '<', 30), ('volumeTrend', '=', 'increasing')], 'confidence', 50, True),
+    'topBuy': ([('action', '=', 'buy')], 'confidence', 50, True),
+    'topSell': ([('action', '=', 'sell')], 'confidence', 50, True),
+    'topGainers': ([('changePercent', '>', 0)], 'changePercent', 50, True),
+    'topLosers': ([('changePercent', '<', 0)], 'changePercent', 50, False),
+    'mostActive': ([], 'volume', 50, True),
+    'goldenSpread': ([('smaSpread', '>', 0), ('rsi', '<', 50)], 'smaSpread', 50, True),
+}
+
+
+def _column(stocks, field, getter) -> list:
+    """整欄取值；UniverseState 直接解碼欄位陣列，衍生欄位與 dict 清單則逐列呼叫 getter"""
+    column = getattr(stocks, 'column', None)
+    values = column(field) if column else None
+    return values if values is not None else [getter(s) for s in stocks]
+
+
+class Screener:
+    """快照的欄式儲存與索引"""
+
+    def __init__(self, stocks):
+        """stocks：data.json 的 dict 清單，或 UniverseState（直接讀取欄位陣列）"""
+        self.rows = stocks
+        self.columns = {}
+        self.sorted_index = {}
+        self.category_index = {}
+        for field, getter in NUMERIC_FIELDS.items():
+            col = _column(stocks, field, getter)
+            self.columns[field] = col
+            pairs = sorted((v, i) for i, v in enumerate(col) if v is not None)
+            self.sorted_index[field] = ([v for v, _ in pairs], [i for _, i in pairs])
+        for field, getter in CATEGORY_FIELDS.items():
+            col = _column(stocks, field, getter)
+            self.columns[field] = col
+            index = {}
+            for i, v in enumerate(col):
+                if v is not None:
+                    index.setdefault(v, []).append(i)
+            self.category_index[field] = index
+        for field, getter in MULTI_FIELDS.items():
+            col = _column(stocks, field, getter)
+            self.columns[field] = col
+            index = {}
+            for i, values in enumerate(col):
+                for v in values:
+                    index.setdefault(v, []).append(i)
+            self.category_index[field] = index
+
+    @classmethod
+    def from_file(cls, path=DATA_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f).get('stocks', []))
+
+    def _range(self, field, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """回傳排序索引中 [lo, hi] 區間對應的列編號（以兩次 bisect 定位，切片會複製該區間）"""
+        values, ids = self.sorted_index[field]
+        start = 0 if lo is None else (bisect_left if lo_inclusive else bisect_right)(values, lo)
+        end = len(values) if hi is None else (bisect_right if hi_inclusive else bisect_left)(values, hi)
+        return ids[start:end] if start < end else []
+
+    def _candidates(self, field, op, value):
+        """單一條件的候選列編號"""
+        if field in NUMERIC_FIELDS:
+            if op == '<':
+                return self._range(field, hi=value, hi_inclusive=False)
+            if op == '<=':
+                return self._range(field, hi=value)
+            if op == '>':
+                return self._range(field, lo=value, lo_inclusive=False)
+            if op == '>=':
+                return self._range(field, lo=value)
+            if op == '=':
+                return self._range(field, lo=value, hi=value)
+            if op == 'between':
+                return self._range(field, lo=value[0], hi=value[1])
+        elif field in CATEGORY_FIELDS or field in MULTI_FIELDS:
+            index = self.category_index[field]
+            if op in ('=', 'has'):
+                return index.get(value, [])
+            if op == 'in':
+                return [i for v in value for i in index.get(v, [])]
+        raise ValueError(f"不支援的條件：{field} {op} {value!r}")
+
+    def _predicate(self, field, op, value):
+        """單一條件的逐列判斷函式，用於過濾已縮小的候選集合"""
+        col = self.columns[field]
+        if field in MULTI_FIELDS:
+            if op == 'has':
+                return lambda i: value in col[i]
+            if op == 'in':
+                return lambda i: any(v in col[i] for v in value)
+        elif op == 'in':
+            return lambda i: col[i] in value
+        elif op == 'between':
+            lo, hi = value
+            return lambda i: col[i] is not None and lo <= col[i] <= hi
+        elif op == '=':
+            return lambda i: col[i] == value
+        elif field in NUMERIC_FIELDS and op in ('<', '<=', '>', '>='):
+            cmp = {
+                '<': lambda v: v < value,
+                '<=': lambda v: v <= value,
+                '>': lambda v: v > value,
+                '>=': lambda v: v >= value,
+            }[op]
+            return lambda i: col[i] is not None and cmp(col[i])
+        raise ValueError(f"不支援的條件：{field} {op} {value!r}")
+
+    def select(self, conditions) -> list:
+        """回傳符合全部條件的列編號。
+        每個條件都先以索引取得候選列編號清單（數值條件複製 bisect 區間，類別條件取反向索引），
+        以最小的候選集合為基底，其餘條件改以逐列判斷過濾該集合，不做集合交集。
+        """
+        if not conditions:
+            return list(range(len(self.rows)))
+        ranked = sorted(((self._candidates(*c), c) for c in conditions), key=lambda x: len(x[0]))
+        ids, _ = ranked[0]
+        for _, cond in ranked[1:]:
+            if not ids:
+                break
+            keep = self._predicate(*cond)
+            ids = [i for i in ids if keep(i)]
+        return ids
+
+    def top(self, conditions=(), order_by='confidence', limit=50, descending=True) -> list:
+        """複合查詢，回傳依 order_by 排序的前 limit 筆列編號。
+        order_by 為 None 的列不列入；同值時依快照中的順序（列編號小者在前），遞增與遞減皆同。
+        """
+        if order_by not in NUMERIC_FIELDS:
+            raise ValueError(f"排序欄位需為數值欄位：{order_by}")
+        col = self.columns[order_by]
+        ids = [i for i in dict.fromkeys(self.select(conditions)) if col[i] is not None]
+        if descending:
+            return heapq.nlargest(limit, ids, key=lambda i: (col[i], -i))
+        return heapq.nsmallest(limit, ids, key=lambda i: (col[i], i))
+
+    def query(self, conditions=(), order_by='confidence', limit=50, descending=True) -> list:
+        """複合查詢，回傳依 order_by 排序的前 limit 筆股票（dict 或 StockRow，依輸入而定）"""
+        return [self.rows[i] for i in self.top(conditions, order_by, limit, descending)]
+
+    def standard_screens(self) -> dict:
+        """計算 STANDARD_SCREENS，回傳 {名稱: [代碼…]}"""
+        symbols = self.columns['symbol']
+        return {
+            name: [symbols[i] for i in self.top(conds, order_by, limit, desc)]
+            for name, (conds, order_by, limit, desc) in STANDARD_SCREENS.items()
+        }
+
+
+_COND_RE = re.compile(r'^\s*(\w+)\s*(<=|>=|==|=|<|>|between|in|has)\s*(.+?)\s*$')
+
+
+def _parse_value(field, text):
+    """數值欄位轉為 float（非數字時拋出 ValueError）；其餘欄位保留字串，例如 symbol = 2330"""
+    text = text.strip().strip('\'"')
+    if field not in NUMERIC_FIELDS:
+        return text
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"{field} 的條件值需為數字：{text!r}")
+
+
+def parse_query(text: str) -> list:
+    """將 'rsi < 30 and sector = 半導體業' 解析為條件清單。
+    between 以 'rsi between 30,50'，in 以 'action in buy,hold' 表示。
+    只有數值欄位的值轉為數字；between 需恰好兩個值、in 至少一個值，否則拋出 ValueError。
+    """
+    conditions = []
+    for part in re.split(r'\s+and\s+', text.strip(), flags=re.IGNORECASE):
+        if not part:
+            continue
+        m = _COND_RE.match(part)
+        if not m:
+            raise ValueError(f"無法解析條件：{part!r}")
+        field, op, raw = m.groups()
+        op = '=' if op == '==' else op
+        if op in ('between', 'in'):
+            value = [_parse_value(field, v) for v in raw.split(',') if v.strip()]
+            if op == 'between' and len(value) != 2:
+                raise ValueError(f"between 需要兩個值（例如 {field} between 30,50）：{part!r}")
+            if op == 'in' and not value:
+                raise ValueError(f"in 至少需要一個值：{part!r}")
+        else:
+            value = _parse_value(field, raw)
+        conditions.append((field, op, value))
+    return conditions
+
+
+def write_screens(stocks, updated_at: str, path=SCREENS_PATH) -> dict:
+    """預先計算常用選股並寫出 screens.json"""
+    screens = Screener(stocks).standard_screens()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'updatedAt': updated_at, 'screens': screens}, f, ensure_ascii=False, indent=2)
+    return screens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以最新快照執行選股查詢')
+    parser.add_argument('query', nargs='?', default='', help="條件，例如 'rsi < 30 and sector = 半導體業'")
+    parser.add_argument('--by', default='confidence', help='排序欄位（預設 confidence）')
+    parser.add_argument('--top', type=int, default=50, help='回傳筆數（預設 50）')
+    parser.add_argument('--asc', action='store_true', help='遞增排序')
+    parser.add_argument('--data', default=str(DATA_PATH), help='快照路徑')
+    args = parser.parse_args(argv)
+
+    try:
+        conditions = parse_query(args.query)
+    except ValueError as e:
+        parser.error(str(e))
+    screener = Screener.from_file(args.data)
+    rows = screener.query(conditions, args.by, args.top, descending=not args.asc)
+    for s in rows:
+        print(f"{s['symbol']:<10} {s.get('name', ''):<12} {args.by}={NUMERIC_FIELDS[args.by](s)}")
+    print(f"\n共 {len(rows)} 筆")
+
+
+if __name__ == '__main__':
+    main()
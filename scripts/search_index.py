@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+股票搜尋索引（僅使用 Python 標準庫）
+- 由 ISIN 名稱映射（代碼.TW/.TWO → 中文名稱）產出分片索引 public/search/
+- 每個分片包含：
+  codes: {代碼: [交易所後綴, 名稱]}，前端可直接決定 .TW 或 .TWO，不需試探
+  grams: {中文名稱 2 字 n-gram: [代碼…]}，供名稱模糊搜尋；
+         分片依 n-gram 首字決定，單字查詢可在同一分片內以前綴比對
+- 依鍵的首字元分片：英數字元各自一片（c0…c9、ca…），其他字元（中文）依碼位分到 h00…h3f
+  前端以相同規則計算分片名稱，單次查詢只需載入數 KB
+"""
+
+import json
+from pathlib import Path
+
+SEARCH_DIR = Path(__file__).parent.parent / 'public' / 'search'
+NGRAM = 2
+HASH_BUCKETS = 64
+INDEX_VERSION = 1
+
+
+def shard_key(text: str) -> str:
+    """回傳查詢字串所屬的分片名稱（需與 src/utils/liveStock.js 的 shardKey 一致）"""
+    ch = text[0].lower()
+    if ch.isascii() and ch.isalnum():
+        return f"c{ch}"
+    return f"h{ord(ch) % HASH_BUCKETS:02x}"
+
+
+def name_ngrams(name: str) -> set:
+    """名稱中長度為 NGRAM 的所有子字串（去除空白）；名稱過短時取整個名稱"""
+    text = ''.join(name.split())
+    if len(text) <= NGRAM:
+        return {text} if text else set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def build_search_index(name_map: dict) -> dict:
+    """回傳 {分片名稱: {'codes': {...}, 'grams': {...}}}"""
+    shards = {}
+
+    def shard(key):
+        s = shards.get(key)
+        if s is None:
+            s = shards[key] = {'codes': {}, 'grams': {}}
+        return s
+
+    for symbol in sorted(name_map):
+        code, _, suffix = symbol.partition('.')
+        if not code:
+            continue
+        name = name_map[symbol]
+        codes = shard(shard_key(code))['codes']
+        # 同代碼同時出現在上市/上櫃時保留先出現者（.TW 排序在前）
+        codes.setdefault(code, [suffix, name])
+        # 依字典序走訪 n-gram，posting list 的順序不受 PYTHONHASHSEED 影響，重跑時分片內容不變
+        for gram in sorted(name_ngrams(name)):
+            target = shard(shard_key(gram))
+            target['grams'].setdefault(gram, []).append(code)
+            target['codes'].setdefault(code, [suffix, name])
+    return shards
+
+
+def write_search_index(name_map: dict, out_dir=SEARCH_DIR) -> dict:
+    """寫出全部分片與 index.json，並移除已不存在的舊分片。回傳 manifest"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards = build_search_index(name_map)
+    for key, payload in shards.items():
+        with open(out_dir / f"{key}.json", 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    for stale in out_dir.glob('*.json'):
+        if stale.stem != 'index' and stale.stem not in shards:
+            stale.unlink()
+    manifest = {
+        'version': INDEX_VERSION,
+        'ngram': NGRAM,
+        'hashBuckets': HASH_BUCKETS,
+        'symbols': len(name_map),
+        'shards': {key: len(shards[key]['codes']) for key in sorted(shards)},
+    }
+    with open(out_dir / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    return manifest
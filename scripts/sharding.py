@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+分片處理工具（僅使用 Python 標準庫）
+- 以代碼的 CRC32 雜湊穩定切分追蹤清單（與執行環境、PYTHONHASHSEED 無關）
+- 每個分片輸出部分結果 shards/shard-{i}-of-{N}.json，保留原清單位置
+- 合併時依原清單位置排序，產出與單一程序執行相同順序與格式的結果
+
+分片編號採 0 起算：`--shard 0/4` ~ `--shard 3/4`。
+"""
+
+import argparse
+import json
+import zlib
+from pathlib import Path
+
+from json_stream import JsonArrayWriter
+
+SHARD_DIR = Path(__file__).parent.parent / 'shards'
+
+
+def parse_shard(text: str) -> tuple:
+    """解析 'K/N' 字串，回傳 (K, N)；作為 argparse 的 type，格式錯誤時拋出 ArgumentTypeError"""
+    try:
+        index, count = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式錯誤：{text!r}（應為 K/N，例如 0/4）")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"分片編號超出範圍：{text!r}（應為 K/N 且 0 <= K < N）")
+    return index, count
+
+
+def parse_shard_count(text: str) -> int:
+    """解析 --merge-shards 的分片數 N（需 >= 1）；作為 argparse 的 type，錯誤時拋出 ArgumentTypeError"""
+    try:
+        count = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片數格式錯誤：{text!r}（應為正整數 N）")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"分片數需 >= 1：{text!r}")
+    return count
+
+
+def shard_of(symbol: str, count: int) -> int:
+    """回傳代碼所屬的分片編號"""
+    return zlib.crc32(symbol.encode('utf-8')) % count
+
+
+def select_shard(symbols: list, index: int, count: int) -> list:
+    """回傳屬於分片 index 的清單位置（依原順序）"""
+    return [pos for pos, sym in enumerate(symbols) if shard_of(sym, count) == index]
+
+
+def partial_path(shard_dir, index: int, count: int) -> Path:
+    return Path(shard_dir) / f"shard-{index}-of-{count}.json"
+
+
+def write_partial(shard_dir, index: int, count: int, universe_size: int, updated_at: str, results, names=None, returns=None) -> Path:
+    """寫入分片部分結果。
+    results: (清單位置, 股票結果 dict) 的序列或產生器
+    names: 全市場名稱映射，僅需由其中一個分片提供
+    returns: {代碼: {日期: 日報酬}}，供合併後更新風險模型
+    """
+    path = partial_path(shard_dir, index, count)
+    head = {
+        'shard': index,
+        'count': count,
+        'universe': universe_size,
+        'updatedAt': updated_at,
+    }
+    if names is not None:
+        head['names'] = names
+    if returns is not None:
+        head['returns'] = returns
+    # 結果逐筆序列化寫出（results 可為產生器），不在記憶體中組出整份 payload
+    with JsonArrayWriter([path], head, 'stocks', indent=None) as writer:
+        for pos, res in results:
+            writer.write({'position': pos, 'stock': res})
+    return path
+
+
+def load_partials(shard_dir, count: int) -> list:
+    """讀取全部 N 個分片，缺漏或設定不一致時拋出 RuntimeError"""
+    partials = []
+    missing = []
+    for index in range(count):
+        path = partial_path(shard_dir, index, count)
+        if not path.exists():
+            missing.append(path.name)
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            partials.append(json.load(f))
+    if missing:
+        raise RuntimeError(f"缺少分片：{', '.join(missing)}")
+    mismatched = [p['shard'] for p in partials if p.get('count') != count]
+    if mismatched:
+        raise RuntimeError(f"分片 {mismatched} 的分片數與 --merge-shards {count} 不一致")
+    universes = {p['universe'] for p in partials}
+    if len(universes) != 1:
+        raise RuntimeError(f"各分片的追蹤清單長度不一致：{sorted(universes)}")
+    return partials
+
+
+def merge_partials(partials: list) -> tuple:
+    """合併分片結果，回傳 (output, names)。
+    output 與單一程序執行的 data.json 格式相同；updatedAt 取各分片最晚者。
+    names 為分片提供的名稱映射（若無則為 None）。
+    """
+    rows = []
+    seen = set()
+    names = None
+    for p in partials:
+        for item in p['stocks']:
+            pos = item['position']
+            if pos in seen:
+                raise RuntimeError(f"清單位置 {pos} 出現在多個分片")
+            seen.add(pos)
+            rows.append((pos, item['stock']))
+        if p.get('names') is not None:
+            names = p['names']
+    rows.sort(key=lambda x: x[0])
+    output = {
+        'updatedAt': max(p['updatedAt'] for p in partials),
+        'stocks': [stock for _, stock in rows],
+    }
+    return output, names
+
+
+def merge_returns(partials: list) -> dict:
+    """合併各分片的日報酬 {代碼: {日期: 報酬}}"""
+    returns = {}
+    for p in partials:
+        returns.update(p.get('returns') or {})
+    return returns
+
+
+def add_shard_arguments(parser):
+    """為 argparse 加入共用的分片參數（--shard 與 --merge-shards 互斥）"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--shard', type=parse_shard, default=None, metavar='K/N',
+                       help='僅處理第 K 個分片（共 N 片，0 起算），輸出部分結果')
+    group.add_argument('--merge-shards', type=parse_shard_count, default=None, metavar='N',
+                       help='合併 N 個分片的部分結果並寫出正式輸出')
+    parser.add_argument('--shard-dir', default=str(SHARD_DIR),
+                        help=f'分片部分結果目錄（預設 {SHARD_DIR}）')
+    return parser
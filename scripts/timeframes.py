@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+多週期 K 棒重取樣（僅使用 Python 標準庫）
+- 由日 K（Yahoo chart 的 timestamp + quote）在本地合成週 K、月 K
+- 單次走訪日 K 即同時產出所有週期，不需額外向 Yahoo 以其他 interval 請求
+- 週以 ISO 週（週一起算）分組，月以曆月分組；日期依交易所時區（gmtoffset）判定
+- 完整指標（長均、RSI、MACD 柱狀體）預設需 35 根 K 棒：週線約 8 個月、月線約 3 年的日 K；
+  update_data_light.py 首次抓取與本地日 K 皆保留約 37 個月（bars.historyDays），不足的週期不輸出
+"""
+
+from datetime import datetime, timedelta, timezone
+
+TIMEFRAMES = ('weekly', 'monthly')
+
+
+def _period_keys(day):
+    iso = day.isocalendar()
+    return {
+        'weekly': (iso[0], iso[1]),
+        'monthly': (day.year, day.month),
+    }
+
+
+def resample_quote(timestamps, quote, timeframes=TIMEFRAMES, utc_offset=0) -> dict:
+    """將日 K 重取樣為多個週期。
+    timestamps: Unix 秒（UTC）
+    quote: {'open','high','low','close','volume'} 各為與 timestamps 等長的 list，可含 None
+    回傳：{timeframe: {'timestamp','open','high','low','close','volume'}}，
+    每根 K 棒的 timestamp 為該週期最後一個交易日。收盤價為 None 的日 K 略過。
+    """
+    opens = quote.get('open') or []
+    highs = quote.get('high') or []
+    lows = quote.get('low') or []
+    closes = quote.get('close') or []
+    volumes = quote.get('volume') or []
+    tz = timezone(timedelta(seconds=utc_offset))
+
+    frames = {tf: {'timestamp': [], 'open': [], 'high': [], 'low': [], 'close': [], 'volume': []} for tf in timeframes}
+    current = {tf: None for tf in timeframes}
+
+    for i, ts in enumerate(timestamps):
+        c = closes[i] if i < len(closes) else None
+        if c is None:
+            continue
+        o = opens[i] if i < len(opens) and opens[i] is not None else c
+        h = highs[i] if i < len(highs) and highs[i] is not None else c
+        lo = lows[i] if i < len(lows) and lows[i] is not None else c
+        v = (volumes[i] if i < len(volumes) else None) or 0
+        keys = _period_keys(datetime.fromtimestamp(ts, tz))
+        for tf in timeframes:
+            bars = frames[tf]
+            if keys[tf] != current[tf]:
+                current[tf] = keys[tf]
+                bars['timestamp'].append(ts)
+                bars['open'].append(o)
+                bars['high'].append(h)
+                bars['low'].append(lo)
+                bars['close'].append(c)
+                bars['volume'].append(v)
+            else:
+                bars['timestamp'][-1] = ts
+                if h > bars['high'][-1]:
+                    bars['high'][-1] = h
+                if lo < bars['low'][-1]:
+                    bars['low'][-1] = lo
+                bars['close'][-1] = c
+                bars['volume'][-1] += v
+    return frames
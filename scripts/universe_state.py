@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+全市場結果的緊湊欄式儲存（僅使用 Python 標準庫）
+- 數值欄位以 array 模組存放（double / int64），None 以 NaN 或 -1 表示
+- 建議動作、量能趨勢、週期趨勢等列舉以 int8 代碼存放
+- 產業別、建議理由、訊號組合以字串表去重後存放編號
+- StockRow（__slots__）提供逐列屬性存取；僅在輸出時才還原成與 build_stock() 相同的 dict
+
+取代 list[dict]（每列含巢狀 recommendation / indicators / timeframes dict 與大量 boxed float），
+記憶體約為原本的數分之一；to_dicts() 還原的鍵順序與值皆與原結構相同（數值欄位以 float 還原）。
+"""
+
+import math
+import sys
+from array import array
+
+from timeframes import TIMEFRAMES
+
+NAN = float('nan')
+
+
+class StringTable:
+    """字串（或 tuple）去重表：值 -> 編號"""
+    __slots__ = ('ids', 'values')
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value) -> int:
+        idx = self.ids.get(value)
+        if idx is None:
+            idx = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _Float:
+    """double 欄位；None <-> NaN"""
+    typecode = 'd'
+
+    def encode(self, v):
+        return NAN if v is None else float(v)
+
+    def decode(self, v):
+        return None if math.isnan(v) else v
+
+
+class _Int:
+    """int64 欄位；None <-> -1"""
+    typecode = 'q'
+
+    def encode(self, v):
+        return -1 if v is None else int(v)
+
+    def decode(self, v):
+        return None if v == -1 else v
+
+
+class _Enum:
+    """int8 列舉欄位；未知值以 -1 表示 None"""
+    typecode = 'b'
+
+    def __init__(self, *choices):
+        self.choices = choices
+        self.codes = {c: i for i, c in enumerate(choices)}
+
+    def encode(self, v):
+        return -1 if v is None else self.codes[v]
+
+    def decode(self, v):
+        return None if v < 0 else self.choices[v]
+
+
+class _Interned:
+    """字串表編號欄位（uint32）；None 亦可去重"""
+    typecode = 'I'
+
+    def __init__(self, table, freeze=None):
+        self.table = table
+        self.freeze = freeze
+
+    def encode(self, v):
+        return self.table.intern(self.freeze(v) if self.freeze else v)
+
+    def decode(self, v):
+        value = self.table.values[v]
+        return list(value) if self.freeze else value
+
+
+ACTIONS = ('hold', 'buy', 'sell')
+VOLUME_TRENDS = ('neutral', 'increasing', 'decreasing')
+TRENDS = ('up', 'down')
+
+
+class UniverseState:
+    """以欄為單位存放全市場結果；欄位順序即輸出 dict 的鍵順序"""
+
+    def __init__(self, timeframes=TIMEFRAMES):
+        self.strings = StringTable()
+        self.signal_sets = StringTable()
+        self.timeframes = tuple(timeframes)
+        interned = _Interned(self.strings)
+        self.schema = [
+            (('price',), _Float()),
+            (('change',), _Float()),
+            (('changePercent',), _Float()),
+            (('volume',), _Int()),
+            (('sector',), interned),
+            (('indicators', 'sma5'), _Float()),
+            (('indicators', 'sma20'), _Float()),
+            (('indicators', 'rsi'), _Float()),
+            (('indicators', 'macdHistogram'), _Float()),
+            (('indicators', 'volumeTrend'), _Enum(*VOLUME_TRENDS)),
+            (('recommendation', 'action'), _Enum(*ACTIONS)),
+            (('recommendation', 'reason'), interned),
+            (('recommendation', 'confidence'), _Float()),
+            (('recommendation', 'signals'), _Interned(self.signal_sets, freeze=tuple)),
+        ]
+        for tf in self.timeframes:
+            self.schema += [
+                (('timeframes', tf, 'bars'), _Int()),
+                (('timeframes', tf, 'smaShort'), _Float()),
+                (('timeframes', tf, 'smaLong'), _Float()),
+                (('timeframes', tf, 'rsi'), _Float()),
+                (('timeframes', tf, 'macdHistogram'), _Float()),
+                (('timeframes', tf, 'trend'), _Enum(*TRENDS)),
+            ]
+        self.field_index = {path: k for k, (path, _) in enumerate(self.schema)}
+        self.symbols = []
+        self.names = []
+        self.positions = array('q')
+        # 各列實際具備的巢狀區塊（indicators / timeframes.<tf>），以位元遮罩記錄
+        self.groups = ('indicators', 'recommendation', 'timeframes') + tuple(f"timeframes.{tf}" for tf in self.timeframes)
+        self.group_bits = {g: 1 << i for i, g in enumerate(self.groups)}
+        self.present = array('I')
+        self.columns = [array(codec.typecode) for _, codec in self.schema]
+        # 未列入 schema 的欄位（相容用，正常情況為空）
+        self.extras = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _groups_of(self, path):
+        """欄位所屬的巢狀區塊（需在 present 遮罩中才輸出）"""
+        if len(path) == 1:
+            return ()
+        if path[0] == 'timeframes':
+            return ('timeframes', f"timeframes.{path[1]}")
+        return (path[0],)
+
+    def append(self, stock: dict, position: int = -1):
+        """將 build_stock() 的 dict 轉入欄式儲存（原 dict 不保留）"""
+        i = len(self.symbols)
+        self.symbols.append(stock['symbol'])
+        self.names.append(stock['name'])
+        self.positions.append(position)
+        mask = 0
+        for g in self.groups:
+            node = stock
+            for key in g.split('.'):
+                node = node.get(key) if isinstance(node, dict) else None
+            if isinstance(node, dict):
+                mask |= self.group_bits[g]
+        self.present.append(mask)
+
+        known = {'symbol', 'name'}
+        for (path, codec), col in zip(self.schema, self.columns):
+            node = stock
+            for key in path:
+                node = node.get(key) if isinstance(node, dict) else None
+            col.append(codec.encode(node))
+            known.add(path[0])
+        extra = {k: v for k, v in stock.items() if k not in known}
+        tf_block = stock.get('timeframes') or {}
+        extra_tf = {k: v for k, v in tf_block.items() if k not in self.timeframes}
+        if extra_tf:
+            extra['timeframes'] = extra_tf
+        if extra:
+            self.extras[i] = extra
+        return i
+
+    def __getitem__(self, i):
+        return StockRow(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.symbols)):
+            yield StockRow(self, i)
+
+    def to_dict(self, i: int) -> dict:
+        """還原第 i 列為與 build_stock() 相同的 dict（schema 外的欄位附加在最後）"""
+        out = {'symbol': self.symbols[i], 'name': self.names[i]}
+        mask = self.present[i]
+        bits = self.group_bits
+        for (path, codec), col in zip(self.schema, self.columns):
+            groups = self._groups_of(path)
+            if groups and not mask & bits[groups[0]]:
+                continue
+            node = out
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+                if len(groups) > 1 and not mask & bits[groups[1]]:
+                    break
+            else:
+                node[path[-1]] = codec.decode(col[i])
+        if mask & bits['timeframes']:
+            out.setdefault('timeframes', {})
+        for key, value in self.extras.get(i, {}).items():
+            if key == 'timeframes':
+                out.setdefault('timeframes', {}).update(value)
+            else:
+                out[key] = value
+        return out
+
+    def to_dicts(self) -> list:
+        return [self.to_dict(i) for i in range(len(self.symbols))]
+
+    def items(self):
+        """逐列產生 (清單位置, dict)，供分片輸出時邊還原邊寫出"""
+        for i in range(len(self.symbols)):
+            yield self.positions[i], self.to_dict(i)
+
+    def column(self, name: str):
+        """以 StockRow 屬性名稱取整欄解碼後的值（list）；不在欄式儲存中的欄位回傳 None"""
+        if name == 'symbol':
+            return list(self.symbols)
+        if name == 'name':
+            return list(self.names)
+        k = self.field_index.get(StockRow._FIELDS.get(name))
+        if k is None:
+            return None
+        decode = self.schema[k][1].decode
+        return [decode(v) for v in self.columns[k]]
+
+    def nbytes(self) -> int:
+        """欄位陣列與字串表的大致記憶體用量（位元組）"""
+        total = sum(col.buffer_info()[1] * col.itemsize for col in self.columns)
+        total += self.positions.buffer_info()[1] * self.positions.itemsize
+        total += self.present.buffer_info()[1] * self.present.itemsize
+        total += sum(sys.getsizeof(s) for s in self.symbols) + sys.getsizeof(self.symbols)
+        total += sum(sys.getsizeof(s) for s in self.names) + sys.getsizeof(self.names)
+        total += sum(sys.getsizeof(s) for s in self.strings.values)
+        total += sum(sys.getsizeof(s) for s in self.signal_sets.values)
+        return total
+
+
+class StockRow:
+    """單列唯讀檢視；屬性名稱沿用輸出 JSON 的鍵"""
+    __slots__ = ('_state', '_i')
+
+    _FIELDS = {
+        'price': ('price',),
+        'change': ('change',),
+        'changePercent': ('changePercent',),
+        'volume': ('volume',),
+        'sector': ('sector',),
+        'sma5': ('indicators', 'sma5'),
+        'sma20': ('indicators', 'sma20'),
+        'rsi': ('indicators', 'rsi'),
+        'macdHistogram': ('indicators', 'macdHistogram'),
+        'volumeTrend': ('indicators', 'volumeTrend'),
+        'action': ('recommendation', 'action'),
+        'reason': ('recommendation', 'reason'),
+        'confidence': ('recommendation', 'confidence'),
+        'signals': ('recommendation', 'signals'),
+    }
+
+    def __init__(self, state, i):
+        self._state = state
+        self._i = i
+
+    @property
+    def symbol(self):
+        return self._state.symbols[self._i]
+
+    @property
+    def name(self):
+        return self._state.names[self._i]
+
+    def __getattr__(self, attr):
+        path = StockRow._FIELDS.get(attr)
+        if path is None:
+            raise AttributeError(attr)
+        state = self._state
+        k = state.field_index.get(path)
+        if k is None:
+            raise AttributeError(attr)
+        return state.schema[k][1].decode(state.columns[k][self._i])
+
+    def to_dict(self) -> dict:
+        return self._state.to_dict(self._i)
+
+    def __repr__(self):
+        return f"StockRow({self.symbol!r})"
@@ -9,11 +9,17 @@
 5. 寫入 public/data.json
 """
 
+import argparse
 import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from profiling import timed, profile_session, add_profile_arguments
+from json_stream import JsonArrayWriter
+from pipeline import Pipeline
+from sharding import SHARD_DIR, add_shard_arguments, select_shard, write_partial, load_partials, merge_partials
+
 try:
     import yfinance as yf
     import pandas as pd
@@ -30,6 +36,7 @@ def load_config():
         return json.load(f)
 
 
+@timed()
 def _fetch_isin_table(str_mode: int) -> pd.DataFrame:
     """從 TWSE ISIN 公開頁面抓取表格
     str_mode: 2=上市, 4=上櫃
@@ -122,6 +129,7 @@ def get_tw_tech_tickers(include_otc: bool = True, include_sectors=None, include_
     return tickers
 
 
+@timed()
 def fetch_stock_data(symbol, period='3mo'):
     """抓取股票資料"""
     try:
@@ -150,6 +158,7 @@ def calculate_sma(prices, period):
     return prices[-period:].mean()
 
 
+@timed()
 def calculate_rsi(prices, period=14):
     """計算 RSI 指標"""
     if len(prices) < period + 1:
@@ -168,6 +177,7 @@ def calculate_rsi(prices, period=14):
     return rsi.iloc[-1]
 
 
+@timed()
 def calculate_indicators(hist, config):
     """計算所有技術指標"""
     closes = hist['Close']
@@ -238,6 +248,7 @@ def generate_recommendation(indicators, config):
     }
 
 
+@timed()
 def process_stock(symbol, config):
     """處理單一股票"""
     print(f"📊 處理 {symbol}...")
@@ -304,7 +315,26 @@ def save_history(data):
     print(f"📅 已儲存歷史快照至 {history_path}")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='每日股票資料更新腳本')
+    add_profile_arguments(parser, Path(__file__).parent.parent / 'profile')
+    add_shard_arguments(parser)
+    parser.add_argument('--serial', action='store_true',
+                        help='不使用多執行緒管線，依序處理（--profile 時自動啟用）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profile_session(args.profile_dir, profile=args.profile, trace_memory=args.trace_memory):
+        if args.merge_shards:
+            merge(args.merge_shards, args.shard_dir)
+        else:
+            run(shard=args.shard, shard_dir=args.shard_dir, serial=args.serial or args.profile)
+
+
+def run(shard=None, shard_dir=SHARD_DIR, serial=False):
+    """執行更新；shard=(i, N) 時僅處理該分片並輸出部分結果"""
     print("🚀 開始更新股票資料...\n")
     
     # 載入設定
@@ -332,32 +362,77 @@ def main():
 
     print(f"📋 追蹤股票（共 {len(watchlist)} 檔）：{', '.join(watchlist[:20])}{' …' if len(watchlist)>20 else ''}\n")
     
-    # 處理所有股票
-    stocks = []
-    for symbol in watchlist:
-        result = process_stock(symbol, config)
-        if result:
-            stocks.append(result)
-    
-    if not stocks:
+    positions = list(range(len(watchlist)))
+    if shard:
+        index, count = shard
+        positions = select_shard(watchlist, index, count)
+        print(f"🧩 分片 {index}/{count}：處理 {len(positions)} / {len(watchlist)} 檔\n")
+
+    # 處理所有股票：多執行緒抓取與計算，依原順序邊處理邊寫出
+    output_path = Path(__file__).parent.parent / 'public' / 'data.json'
+    history_path = Path(__file__).parent.parent / 'history' / f"{datetime.now().strftime('%Y-%m-%d')}.json"
+    results = []
+
+    def process(pos):
+        result = process_stock(watchlist[pos], config)
+        return (pos, result) if result else None
+
+    def sink(seq, item):
+        if item is None:
+            return
+        if writer is not None:
+            writer.write(item[1])
+        else:
+            results.append(item)
+
+    pipe_cfg = config.get('pipeline', {}) or {}
+    pipe = Pipeline(
+        [('process', process, pipe_cfg.get('fetchWorkers', 4))],
+        queue_size=pipe_cfg.get('queueSize', 32),
+        window=pipe_cfg.get('window', 64),
+        on_error=lambda stage, pos, e: print(f"❌ {watchlist[pos]} 失敗：{e}")
+    )
+    # 從開啟暫存檔到正式替換之間任何一步失敗（含 exit），都刪除暫存檔；close() 之後 abort() 不動作
+    writer = None
+    if not shard:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        writer = JsonArrayWriter([output_path, history_path], {'updatedAt': datetime.now().isoformat()}, 'stocks')
+    try:
+        pipe.run(positions, sink, serial=serial)
+
+        if shard:
+            path = write_partial(shard_dir, index, count, len(watchlist), datetime.now().isoformat(), results)
+            print(f"\n🧩 已儲存分片結果至 {path}（{len(results)} 檔）")
+            return
+
+        if not writer.count:
+            writer.abort()
+            print("\n❌ 沒有成功抓取任何股票資料")
+            exit(1)
+        writer.close()
+    finally:
+        if writer is not None:
+            writer.abort()
+    print(f"💾 已儲存至 {output_path}")
+    print(f"📅 已儲存歷史快照至 {history_path}")
+
+    print(f"\n🎉 完成！成功更新 {writer.count} 檔股票")
+    print(f"⏰ 更新時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def merge(count, shard_dir):
+    """合併 N 個分片部分結果，寫出與單一程序執行相同的輸出"""
+    print(f"🧩 合併 {count} 個分片結果…")
+    output, _ = merge_partials(load_partials(shard_dir, count))
+    if not output['stocks']:
         print("\n❌ 沒有成功抓取任何股票資料")
         exit(1)
-    
-    # 組合輸出
-    output = {
-        'updatedAt': datetime.now().isoformat(),
-        'stocks': stocks
-    }
-    
-    # 儲存到 public/data.json
+
     output_path = Path(__file__).parent.parent / 'public' / 'data.json'
     save_to_json(output, output_path)
-    
-    # 儲存歷史快照
     save_history(output)
-    
-    print(f"\n🎉 完成！成功更新 {len(stocks)} 檔股票")
-    print(f"⏰ 更新時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    print(f"\n🎉 完成！合併 {len(output['stocks'])} 檔股票")
 
 
 if __name__ == '__main__':
@@ -2,26 +2,60 @@
 """
 輕量版每日股票資料更新腳本（無外部依賴）
 - 僅使用 Python 標準庫（urllib、json、datetime、pathlib）
-- 直接呼叫 Yahoo Finance Chart API 抓 3 個月日資料
+- 直接呼叫 Yahoo Finance Chart API，以 period1/period2 只抓 bars.historyDays（預設 1130 天）日資料
+  （已有近期 K 線時只抓 1 個月並偵測除權息）
+- 週/月 K 由同一份日 K 重取樣；K 棒數不足以計算完整指標的週期不輸出、也不參與建議
+  （需 max(sma_long, rsi_period + 1, 35) 根，預設 35 根：週線約 8 個月、月線約 3 年日 K）
+- 日線指標（SMA/RSI/MACD/背離）只取最近 92 天日 K，與原本抓取 3 個月時相同，建議邏輯不因較長歷史而改變
 - 計算 SMA 與 RSI，生成投資建議
-- 寫入 public/data.json 與 history/YYYY-MM-DD.json
+- 抓取、計算與寫出以串流管線重疊進行，結果逐筆寫入 public/data.json 與 history/YYYY-MM-DD.json
 
 使用時機：本機環境無法安裝 pip/yfinance 時的替代方案。
 """
 
+import argparse
 import json
 import os
+from bisect import bisect_left
 from urllib.request import urlopen, Request
 from urllib.parse import quote as url_quote
 from html.parser import HTMLParser
 from datetime import datetime
 from pathlib import Path
 
+from profiling import timed, profile_session, add_profile_arguments
+import indicators_fast as fast
+from indicator_cache import CACHE_DIR, IndicatorCache, bars_fingerprint
+from json_stream import JsonArrayWriter
+from pipeline import Pipeline
+from aggregates import compute_aggregates
+from bar_store import BARS_DIR, BAR_KEYS, BarStore, extract_bars, parse_events
+from alerts import ALERTS_PATH, STATE_PATH as ALERTS_STATE_PATH, run_alerts
+from risk import MODEL_DIR, RISK_PATH, RiskModel, daily_returns, write_risk
+from screener import write_screens
+from search_index import SEARCH_DIR, write_search_index
+from universe_state import UniverseState
+from timeframes import TIMEFRAMES, resample_quote
+from sharding import SHARD_DIR, add_shard_arguments, select_shard, write_partial, load_partials, merge_partials, merge_returns
+
 CONFIG_PATH = Path(__file__).parent / 'config.json'
 OUTPUT_PATH = Path(__file__).parent.parent / 'public' / 'data.json'
 HISTORY_DIR = Path(__file__).parent.parent / 'history'
-
-YF_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=3mo&interval=1d"
+PROFILE_DIR = Path(__file__).parent.parent / 'profile'
+NAMES_PATH = Path(__file__).parent.parent / 'public' / 'names.json'
+AGGREGATES_PATH = Path(__file__).parent.parent / 'public' / 'aggregates.json'
+SCREENS_PATH = Path(__file__).parent.parent / 'public' / 'screens.json'
+
+YF_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?{span}&interval=1d&events=div%2Csplit"
+# 本地日 K 保留天數，也是首次抓取的區間：月線需 35 根完整月 K（含當月約 37 個月），見 timeframe_min_bars
+HISTORY_DAYS = 1130
+# 日線指標的計算區間（天）：沿用原本 range=3mo 的長度，較長的歷史只供週/月 K 使用
+DAILY_WINDOW_DAYS = 92
+# MACD 慢線與訊號線週期（與 indicators_fast.macd 的預設值相同），柱狀體需 slow + signal 根
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+# 背離偵測只需最近 20 個 RSI；先以尾端區間計算，不足時再走訪完整序列
+DIVERGENCE_WINDOW = 60
 TWSE_ISIN_URL = "https://isin.twse.com.tw/isin/C_public.jsp?strMode={mode}"
 
 
@@ -61,6 +95,7 @@ class _ISINTableParser(HTMLParser):
     """極簡 HTML 表格解析器，抓取 TWSE ISIN 主表的 TD 文字。
     期望欄序：
     0: 有價證券代號及名稱, 1: ISIN, 2: 上市/上櫃日, 3: 市場別, 4: 產業別, 5: CFICode, 6: 備註
+    空白儲存格同樣保留為 ''，避免後續欄位前移（例如產業別空白時 r[4] 誤取 CFICode）
     """
     def __init__(self):
         super().__init__()
@@ -69,12 +104,15 @@ class _ISINTableParser(HTMLParser):
         self.current_row = []
         self.rows = []
 
+    feed = timed('_ISINTableParser.feed')(HTMLParser.feed)
+
     def handle_starttag(self, tag, attrs):
         if tag.lower() == 'tr':
             self.in_tr = True
             self.current_row = []
         elif tag.lower() == 'td' and self.in_tr:
             self.in_td = True
+            self.current_row.append('')
 
     def handle_endtag(self, tag):
         if tag.lower() == 'td':
@@ -86,9 +124,10 @@ class _ISINTableParser(HTMLParser):
 
     def handle_data(self, data):
         if self.in_td:
-            self.current_row.append(data)
+            self.current_row[-1] += data
 
 
+@timed()
 def fetch_isin_rows(mode: int) -> list:
     """抓取 TWSE ISIN 表格列資料。
     mode=2: 上市, mode=4: 上櫃
@@ -131,12 +170,14 @@ def is_allowed_security(code: str, row: list) -> bool:
 def build_tw_all_universe(include_otc=True, include_sectors=None, include_etf=False, include_all_sectors=False) -> tuple:
     """抓取台股全市場股票與ETF
     include_all_sectors: True時忽略 include_sectors，抓取所有產業
+    回傳：(代碼清單, 代碼→名稱, 代碼→產業別)
     """
     if include_sectors is None:
         include_sectors = []
 
     tickers = []
     name_map = {}
+    sector_map = {}
     try:
         # 上市
         rows = fetch_isin_rows(2)
@@ -153,6 +194,7 @@ def build_tw_all_universe(include_otc=True, include_sectors=None, include_etf=Fa
                 sym = f"{code}.TW"
                 tickers.append(sym)
                 name_map[sym] = cname
+                sector_map[sym] = r[4]
                 continue
 
             if include_all_sectors:
@@ -160,11 +202,13 @@ def build_tw_all_universe(include_otc=True, include_sectors=None, include_etf=Fa
                     sym = f"{code}.TW"
                     tickers.append(sym)
                     name_map[sym] = cname
+                    sector_map[sym] = r[4]
             elif include_sectors and r[4] in include_sectors:
                 if is_allowed_security(code, r):
                     sym = f"{code}.TW"
                     tickers.append(sym)
                     name_map[sym] = cname
+                    sector_map[sym] = r[4]
         
         # 上櫃
         if include_otc:
@@ -180,6 +224,7 @@ def build_tw_all_universe(include_otc=True, include_sectors=None, include_etf=Fa
                     sym = f"{code}.TWO"
                     tickers.append(sym)
                     name_map[sym] = cname
+                    sector_map[sym] = r[4]
                     continue
 
                 if include_all_sectors:
@@ -187,18 +232,20 @@ def build_tw_all_universe(include_otc=True, include_sectors=None, include_etf=Fa
                         sym = f"{code}.TWO"
                         tickers.append(sym)
                         name_map[sym] = cname
+                        sector_map[sym] = r[4]
                 elif include_sectors and r[4] in include_sectors:
                     if is_allowed_security(code, r):
                         sym = f"{code}.TWO"
                         tickers.append(sym)
                         name_map[sym] = cname
+                        sector_map[sym] = r[4]
         
         # 去重排序
         tickers = sorted(list(dict.fromkeys(tickers)))
     except Exception as e:
         print(f"⚠️ 取得台股清單失敗：{e}")
         tickers = []
-    return tickers, name_map
+    return tickers, name_map, sector_map
 
 
 def last_valid(values):
@@ -218,6 +265,9 @@ def prev_last_valid(values):
     return None
 
 
+# --- 參考實作：compute_indicators() 使用 indicators_fast.py 的等價快速版本，
+#     scripts/verify_indicators.py 以這裡的實作為基準對照 ---
+
 def sma(values, period):
     arr = [v for v in values if v is not None]
     if len(arr) < period:
@@ -309,7 +359,7 @@ def detect_divergence(prices, rsi_values):
     return None
 
 
-def recommend(sma5, sma20, sma200, rsi_val, macd_line, signal_line, histogram, volume_trend, divergence, cfg_ind):
+def recommend(sma5, sma20, sma200, rsi_val, macd_line, signal_line, histogram, volume_trend, divergence, cfg_ind, mtf=None):
     """整合多指標的建議演算法
     參數：
     - sma5, sma20, sma200: 短中長期均線
@@ -317,6 +367,8 @@ def recommend(sma5, sma20, sma200, rsi_val, macd_line, signal_line, histogram, v
     - macd_line, signal_line, histogram: MACD 指標
     - volume_trend: 成交量趨勢 ('increasing', 'decreasing', 'neutral')
     - divergence: 背離狀態 ('bullish', 'bearish', None)
+    - mtf: 多週期指標 {'weekly': {...,'trend'}, 'monthly': {...}}，用於確認日線訊號；
+      K 棒數不足的週期不會出現在 mtf 中，因此不影響建議
     """
     action = 'hold'
     reason = '價格持穩，建議續抱觀察'
@@ -388,6 +440,20 @@ def recommend(sma5, sma20, sma200, rsi_val, macd_line, signal_line, histogram, v
                 action = 'hold'
                 reason = '價格持穩於均線附近，靜待明確訊號'
                 confidence = 0.52
+
+    # === 多週期確認：週/月線趨勢同向時提高信心，反向時降低 ===
+    if mtf and action != 'hold':
+        for tf, label in (('weekly', '週線'), ('monthly', '月線')):
+            trend = (mtf.get(tf) or {}).get('trend')
+            if not trend:
+                continue
+            if (action == 'buy' and trend == 'up') or (action == 'sell' and trend == 'down'):
+                signals.append(f'{label}同向確認')
+                confidence += 0.03
+            else:
+                signals.append(f'{label}趨勢相反')
+                confidence -= 0.05
+        confidence = min(max(confidence, 0.05), 0.95)
     
     return {
         'action': action,
@@ -397,35 +463,40 @@ def recommend(sma5, sma20, sma200, rsi_val, macd_line, signal_line, histogram, v
     }
 
 
-def process_symbol(symbol: str, cfg, name_map=None):
-    url = YF_CHART_URL.format(symbol=url_quote(symbol))
-    j = http_get_json(url)
-    result = j.get('chart', {}).get('result')
-    if not result:
-        print(f"❌ {symbol} 抓取失敗")
-        return None
-    r0 = result[0]
-    qdata = r0.get('indicators', {}).get('quote', [{}])[0]
-    closes = qdata.get('close', [])
-    volumes = qdata.get('volume', [])
+def timeframe_min_bars(cfg_ind) -> int:
+    """週/月 K 計算完整指標（長均、RSI、MACD 柱狀體）所需的最少 K 棒數"""
+    return max(cfg_ind['sma_short'], cfg_ind['sma_long'], cfg_ind['rsi_period'] + 1, MACD_SLOW + MACD_SIGNAL)
 
-    close_price = last_valid(closes)
-    prev_close = prev_last_valid(closes) or close_price
-    if close_price is None:
-        print(f"❌ {symbol} 無有效收盤價")
+
+def timeframe_indicators(closes, cfg_ind):
+    """較長週期（週/月 K）的 SMA/RSI/MACD 與趨勢方向
+    有效 K 棒少於 timeframe_min_bars() 時回傳 None（該週期不輸出、不參與建議）
+    trend：短均 > 長均為 'up'，反之 'down'；相等時為 None
+    """
+    bars = sum(1 for c in closes if c is not None)
+    if bars < timeframe_min_bars(cfg_ind):
         return None
+    sma_s = fast.sma(closes, cfg_ind['sma_short'])
+    sma_l = fast.sma(closes, cfg_ind['sma_long'])
+    rsi_v = fast.rsi(closes, cfg_ind['rsi_period'])
+    macd_line, signal_line, histogram = fast.macd(closes, slow=MACD_SLOW, signal=MACD_SIGNAL)
 
-    change = close_price - prev_close
-    change_percent = (0 if prev_close == 0 else (change / prev_close * 100))
+    trend = None
+    if sma_s and sma_l:
+        trend = 'up' if sma_s > sma_l else 'down' if sma_s < sma_l else None
 
-    # 計算多種技術指標
-    sma5 = sma(closes, 5)
-    sma20 = sma(closes, 20)
-    sma200 = sma(closes, 200)
-    rsi_v = rsi(closes, cfg['indicators']['rsi_period'])
-    macd_line, signal_line, histogram = macd(closes)
-    
-    # 成交量趨勢
+    return {
+        'bars': bars,
+        'smaShort': sma_s,
+        'smaLong': sma_l,
+        'rsi': rsi_v,
+        'macdHistogram': histogram,
+        'trend': trend,
+    }
+
+
+def detect_volume_trend(volumes) -> str:
+    """成交量趨勢：近 5 日均量相對前 5 日 ±20%"""
     volume_trend = 'neutral'
     if len(volumes) >= 10:
         recent_vol = [v for v in volumes[-5:] if v]
@@ -437,20 +508,138 @@ def process_symbol(symbol: str, cfg, name_map=None):
                 volume_trend = 'increasing'
             elif avg_recent < avg_earlier * 0.8:
                 volume_trend = 'decreasing'
+    return volume_trend
+
+
+def indicator_params(cfg_ind) -> dict:
+    """compute_indicators() 實際使用的參數，作為快取指紋的一部分。
+    rsi_oversold / rsi_overbought 只由 recommend() 讀取，調整門檻不應使指標快取失效。
+    """
+    return {
+        'sma_short': cfg_ind['sma_short'],
+        'sma_long': cfg_ind['sma_long'],
+        'rsi_period': cfg_ind['rsi_period'],
+        'timeframes': list(cfg_ind.get('timeframes', TIMEFRAMES)),
+        'macd': [MACD_SLOW, MACD_SIGNAL],
+        'divergence_window': DIVERGENCE_WINDOW,
+        'daily_window_days': DAILY_WINDOW_DAYS,
+    }
+
+
+def compute_indicators(closes, volumes, cfg_ind, frames=None) -> dict:
+    """計算 recommend() 所需的全部指標（純函式，結果可快取）
+    frames: resample_quote() 產出的週/月 K，用於多週期指標；K 棒數不足的週期不列入 timeframes
+    """
+    sma5 = fast.sma(closes, 5)
+    sma20 = fast.sma(closes, 20)
+    sma200 = fast.sma(closes, 200)
+    rsi_v = fast.rsi(closes, cfg_ind['rsi_period'])
+    macd_line, signal_line, histogram = fast.macd(closes)
     
-    # 背離偵測
-    rsi_values = []
-    for i in range(14, len(closes)):
-        r = rsi(closes[:i+1], 14)
-        if r:
-            rsi_values.append(r)
-    divergence = detect_divergence(closes, rsi_values) if len(rsi_values) > 20 else None
+    volume_trend = detect_volume_trend(volumes)
+
+    # 背離偵測：尾端區間已有超過 20 個 RSI 時，其最後 20 個與完整序列相同
+    rsi_values = fast.rsi_series(closes[-DIVERGENCE_WINDOW:], 14)
+    if len(rsi_values) <= 20:
+        rsi_values = fast.rsi_series(closes, 14)
+    divergence = fast.detect_divergence(closes, rsi_values) if len(rsi_values) > 20 else None
+
+    timeframes = {tf: timeframe_indicators(bars['close'], cfg_ind) for tf, bars in (frames or {}).items()}
+
+    return {
+        'sma5': sma5,
+        'sma20': sma20,
+        'sma200': sma200,
+        'rsi': rsi_v,
+        'macd_line': macd_line,
+        'signal_line': signal_line,
+        'histogram': histogram,
+        'volume_trend': volume_trend,
+        'divergence': divergence,
+        'timeframes': {tf: values for tf, values in timeframes.items() if values is not None},
+    }
+
+
+@timed()
+def fetch_chart(symbol: str, range_=None, history_days=HISTORY_DAYS, now_ts=None):
+    """抓取日 K（管線的網路階段）。
+    range_（如 '1mo'）指定時抓取該區間；否則以 period1/period2 只抓最近 history_days 天，
+    與 build_stock() 裁切後保留的日 K 相同，不下載之後會被捨棄的舊資料
+    """
+    if range_:
+        span = f"range={range_}"
+    else:
+        end = int(now_ts if now_ts is not None else datetime.now().timestamp())
+        span = f"period1={end - history_days * 86400}&period2={end}"
+    return http_get_json(YF_CHART_URL.format(symbol=url_quote(symbol), span=span))
+
+
+@timed()
+def build_stock(symbol: str, j, cfg, name_map=None, cache=None, sector_map=None, returns_sink=None, bar_store=None):
+    """由 chart API 回應計算指標與建議（管線的計算階段）"""
+    result = j.get('chart', {}).get('result')
+    if not result:
+        print(f"❌ {symbol} 抓取失敗")
+        return None
+    r0 = result[0]
+    # 與本地日 K 合併；偵測到除權息或分割時就地調整該代碼的歷史 K 線
+    bars = extract_bars(r0)
+    if bar_store is not None:
+        bars, actions = bar_store.merge(symbol, bars, parse_events(r0))
+        for kind, factor in actions:
+            print(f"🪙 {symbol} 偵測到{'分割' if kind == 'split' else '除權息'}，已調整歷史 K 線（係數 {factor:.4f}）")
+    # 先裁成與本地日 K 相同的保留天數：首次抓取（或停用本地日 K 時每次抓取）與之後補抓合併的結果計算出相同的週/月指標
+    history_days = int((cfg.get('bars') or {}).get('historyDays', HISTORY_DAYS))
+    start = bisect_left(bars['ts'], bars['ts'][-1] - history_days * 86400) if bars['ts'] else 0
+    if start:
+        bars = {key: bars[key][start:] for key in BAR_KEYS}
+    timestamps = bars['ts']
+    closes = bars['close']
+    volumes = bars['volume']
+    # 技術指標與報酬以還原價計算，避免除息日的假跌破
+    adj = bars['adj']
+
+    close_price = last_valid(closes)
+    prev_close = prev_last_valid(closes) or close_price
+    if close_price is None:
+        print(f"❌ {symbol} 無有效收盤價")
+        return None
+
+    change = close_price - prev_close
+    change_percent = (0 if prev_close == 0 else (change / prev_close * 100))
+
+    # 日報酬供風險模型使用（僅取最近 risk.historyDays 天，模型以 EWMA 增量累積更早的資料）
+    if returns_sink is not None:
+        days = int((cfg.get('risk') or {}).get('historyDays', 92))
+        start = bisect_left(timestamps, timestamps[-1] - days * 86400) if timestamps else 0
+        returns_sink[symbol] = daily_returns(
+            timestamps[start:], adj[start:],
+            utc_offset=(r0.get('meta') or {}).get('gmtoffset') or 0
+        )
+
+    # 計算多種技術指標（輸入未變動時直接取用快取）
+    ind = None
+    if cache is not None:
+        fingerprint = bars_fingerprint(symbol, timestamps, adj, volumes, indicator_params(cfg['indicators']))
+        ind = cache.get(symbol, fingerprint)
+    if ind is None:
+        # 週/月 K 由同一份日 K 重取樣，不額外發出請求
+        frames = resample_quote(
+            timestamps, {'close': adj, 'volume': volumes},
+            timeframes=cfg['indicators'].get('timeframes', TIMEFRAMES),
+            utc_offset=(r0.get('meta') or {}).get('gmtoffset') or 0
+        )
+        # 日線指標只取最近 DAILY_WINDOW_DAYS 天（sma200 因此維持 None，與原本 3 個月區間的建議一致）
+        daily = bisect_left(timestamps, timestamps[-1] - DAILY_WINDOW_DAYS * 86400) if timestamps else 0
+        ind = compute_indicators(adj[daily:], volumes[daily:], cfg['indicators'], frames)
+        if cache is not None:
+            cache.put(symbol, fingerprint, ind)
 
     recommendation = recommend(
-        sma5, sma20, sma200, rsi_v, 
-        macd_line, signal_line, histogram, 
-        volume_trend, divergence, 
-        cfg['indicators']
+        ind['sma5'], ind['sma20'], ind['sma200'], ind['rsi'],
+        ind['macd_line'], ind['signal_line'], ind['histogram'],
+        ind['volume_trend'], ind['divergence'],
+        cfg['indicators'], ind['timeframes']
     )
 
     # 友善名稱
@@ -467,13 +656,130 @@ def process_symbol(symbol: str, cfg, name_map=None):
         'change': round(change, 2),
         'changePercent': round(change_percent, 2),
         'volume': int(volumes[-1] or 0) if volumes else 0,
-        'recommendation': recommendation
+        'sector': (sector_map or {}).get(symbol) or None,
+        'indicators': {
+            'sma5': round(ind['sma5'], 2) if ind['sma5'] is not None else None,
+            'sma20': round(ind['sma20'], 2) if ind['sma20'] is not None else None,
+            'rsi': round(ind['rsi'], 2) if ind['rsi'] is not None else None,
+            'macdHistogram': round(ind['histogram'], 4) if ind['histogram'] is not None else None,
+            'volumeTrend': ind['volume_trend'],
+        },
+        'recommendation': recommendation,
+        'timeframes': {
+            tf: {k: (round(v, 2) if isinstance(v, float) else v) for k, v in vals.items()}
+            for tf, vals in ind['timeframes'].items()
+        }
     }
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='輕量版每日股票資料更新腳本')
+    add_profile_arguments(parser, PROFILE_DIR)
+    add_shard_arguments(parser)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='停用技術指標快取與本地日 K，全部重新抓取與計算')
+    parser.add_argument('--serial', action='store_true',
+                        help='不使用多執行緒管線，依序處理（--profile 時自動啟用）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profile_session(args.profile_dir, profile=args.profile, trace_memory=args.trace_memory):
+        if args.merge_shards:
+            merge(args.merge_shards, args.shard_dir)
+        else:
+            # cProfile 只剖析主執行緒，剖析時改為依序處理
+            run(shard=args.shard, shard_dir=args.shard_dir, use_cache=not args.no_cache,
+                serial=args.serial or args.profile)
+
+
+def build_full_name_map() -> dict:
+    """全市場名稱映射（加入代碼過濾，避免檔案過大）"""
+    full_name_map = {}
+    for mode, suffix in ((2, '.TW'), (4, '.TWO')):
+        rows = fetch_isin_rows(mode)
+        for r in rows:
+            if len(r) >= 1:
+                parts = r[0].split()
+                if not parts:
+                    continue
+                code = parts[0]
+                cname = r[0].split(maxsplit=1)[1] if len(r[0].split(maxsplit=1)) > 1 else code
+                if is_allowed_security(code, r):
+                    full_name_map[f"{code}{suffix}"] = cname
+    return full_name_map
+
+
+def snapshot_writer(updated_at: str) -> JsonArrayWriter:
+    """開啟 public/data.json 與 history/YYYY-MM-DD.json（日期取自 updatedAt）的增量寫出器"""
+    os.makedirs(OUTPUT_PATH.parent, exist_ok=True)
+    HISTORY_DIR.mkdir(exist_ok=True)
+    return JsonArrayWriter([OUTPUT_PATH, HISTORY_DIR / f"{updated_at[:10]}.json"], {'updatedAt': updated_at}, 'stocks')
+
+
+def save_outputs(output):
+    """寫入 public/data.json、history/YYYY-MM-DD.json 與衍生檔案"""
+    with snapshot_writer(output['updatedAt']) as writer:
+        for stock in output['stocks']:
+            writer.write(stock)
+    print(f"\n💾 已儲存至 {OUTPUT_PATH}")
+    print(f"📅 已儲存歷史快照至 {HISTORY_DIR / (output['updatedAt'][:10] + '.json')}")
+    save_derived(output['stocks'], output['updatedAt'])
+
+
+def save_derived(stocks, updated_at):
+    """寫入 aggregates.json 與 screens.json；stocks 可為 dict 清單或 UniverseState"""
+    # 市場廣度與產業彙總，前端儀表板不需掃描整份 data.json
+    aggregates = compute_aggregates(stocks, updated_at)
+    with open(AGGREGATES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(aggregates, f, ensure_ascii=False, indent=2)
+    print(f"📊 已儲存市場彙總至 {AGGREGATES_PATH}（{len(aggregates['sectors'])} 個產業）")
+
+    screens = write_screens(stocks, updated_at, SCREENS_PATH)
+    print(f"🧮 已儲存常用選股至 {SCREENS_PATH}（{len(screens)} 組）")
+
+
+def save_names(full_name_map):
+    """產出 public/names.json 與分片搜尋索引 public/search/，供前端即時查詢使用"""
+    with open(NAMES_PATH, 'w', encoding='utf-8') as nf:
+        json.dump(full_name_map, nf, ensure_ascii=False)
+    size_kb = NAMES_PATH.stat().st_size // 1024 if NAMES_PATH.exists() else 0
+    print(f"📝 已輸出名稱映射至 {NAMES_PATH}（{len(full_name_map)} 筆，約 {size_kb} KB）")
+
+    manifest = write_search_index(full_name_map, SEARCH_DIR)
+    print(f"🔎 已輸出搜尋索引至 {SEARCH_DIR}（{len(manifest['shards'])} 個分片）")
+
+
+def open_indicator_cache(cfg, shard=None):
+    """依 config.json 的 cache 設定開啟指標快取；停用時回傳 None。
+    分片執行時各自使用獨立檔案，避免多個程序互相覆寫。
+    """
+    cache_cfg = cfg.get('cache', {}) or {}
+    if not cache_cfg.get('enabled', True):
+        return None
+    name = f"indicators-{shard[0]}-of-{shard[1]}.json" if shard else 'indicators.json'
+    return IndicatorCache(CACHE_DIR / name, max_entries=int(cache_cfg.get('maxEntries', 5000)))
+
+
+def open_bar_store(cfg, shard=None):
+    """依 config.json 的 bars 設定開啟本地日 K；停用時回傳 None（每次抓取完整 historyDays）"""
+    bars_cfg = cfg.get('bars', {}) or {}
+    if not bars_cfg.get('enabled', True):
+        return None
+    name = f"bars-{shard[0]}-of-{shard[1]}.json" if shard else 'bars.json'
+    return BarStore(BARS_DIR / name, history_days=int(bars_cfg.get('historyDays', HISTORY_DAYS)))
+
+
+def run(shard=None, shard_dir=SHARD_DIR, use_cache=True, serial=False):
+    """執行更新；shard=(i, N) 時僅處理該分片並輸出部分結果"""
     print("🚀 (輕量) 開始更新股票資料…\n")
     cfg = load_config()
+    cache = open_indicator_cache(cfg, shard) if use_cache else None
+    bar_store = open_bar_store(cfg, shard) if use_cache else None
+    recent_range = (cfg.get('bars') or {}).get('recentRange', '1mo')
+    history_days = int((cfg.get('bars') or {}).get('historyDays', HISTORY_DAYS))
+    now_ts = datetime.now().timestamp()
 
     # 支援 universe 動態清單（標準庫解析 ISIN 表格）
     uni = cfg.get('universe', {}) or {}
@@ -483,7 +789,7 @@ def main():
         include_all_sectors = bool(uni.get('includeAllSectors', False))
         sectors = uni.get('includeSectors')
         print(f"🧭 使用 universe 設定，動態取得台股{'全市場股票+ETF' if include_all_sectors else '指定產業股票+ETF' if include_etf else '指定產業股票'}清單…")
-        watchlist, name_map = build_tw_all_universe(
+        watchlist, name_map, sector_map = build_tw_all_universe(
             include_otc=include_otc,
             include_sectors=sectors,
             include_etf=include_etf,
@@ -493,10 +799,12 @@ def main():
             print("⚠️ 動態清單取得失敗，回退使用 watchlist 設定")
             watchlist = cfg.get('watchlist', [])
             name_map = {}
+            sector_map = {}
     else:
         watchlist = cfg.get('watchlist', [])
-        # 嘗試建立全市場名稱映射，讓 watchlist 也能有名稱（加入代碼過濾）
+        # 嘗試建立全市場名稱與產業別映射，讓 watchlist 也能有名稱（加入代碼過濾）
         name_map = {}
+        sector_map = {}
         try:
             for mode, suffix in ((2, '.TW'), (4, '.TWO')):
                 rows = fetch_isin_rows(mode)
@@ -506,6 +814,7 @@ def main():
                         cname = r[0].split(maxsplit=1)[1] if len(r[0].split(maxsplit=1)) > 1 else code
                         if is_allowed_security(code, r):
                             name_map[f"{code}{suffix}"] = cname
+                            sector_map[f"{code}{suffix}"] = r[4]
         except Exception:
             pass
 
@@ -515,59 +824,154 @@ def main():
     preview = ", ".join(watchlist[:20]) + (" …" if len(watchlist) > 20 else "")
     print(f"📋 追蹤股票（{len(watchlist)}）：{preview}\n")
 
-    stocks = []
-    for sym in watchlist:
-        try:
-            res = process_symbol(sym, cfg, name_map)
-            if res:
-                stocks.append(res)
-                print(f"✅ {sym}: ${res['price']:.2f} ({res['changePercent']:+.2f}%) - {res['recommendation']['action'].upper()}")
-        except Exception as e:
-            print(f"⚠️ {sym} 失敗：{e}")
-
-    if not stocks:
-        print("\n❌ 沒有成功抓取任何股票資料")
-        return
-
-    output = {
-        'updatedAt': datetime.now().isoformat(),
-        'stocks': stocks
-    }
-
-    os.makedirs(OUTPUT_PATH.parent, exist_ok=True)
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    positions = list(range(len(watchlist)))
+    if shard:
+        index, count = shard
+        positions = select_shard(watchlist, index, count)
+        print(f"🧩 分片 {index}/{count}：處理 {len(positions)} / {len(watchlist)} 檔\n")
+
+    # 結果以欄式儲存累積（供彙總與分片輸出）；完整快照則邊處理邊寫出
+    state = UniverseState(cfg['indicators'].get('timeframes', TIMEFRAMES))
+    returns = {} if (cfg.get('risk') or {}).get('enabled') else None
+    # 快照開頭需先寫出 updatedAt，因此取管線開始的時間
+    updated_at = datetime.now().isoformat()
+
+    # 逐檔處理分為兩個管線階段，計時標籤沿用 process_symbol 以便與先前的剖析報告對照
+    @timed('process_symbol.fetch')
+    def fetch(pos):
+        sym = watchlist[pos]
+        recent = bar_store is not None and bar_store.is_recent(sym, now_ts)
+        if recent:
+            return pos, fetch_chart(sym, recent_range)
+        return pos, fetch_chart(sym, history_days=history_days, now_ts=now_ts)
+
+    @timed('process_symbol.compute')
+    def compute(item):
+        pos, j = item
+        res = build_stock(watchlist[pos], j, cfg, name_map, cache, sector_map, returns, bar_store)
+        return (pos, res) if res else None
+
+    def on_error(stage, item, e):
+        pos = item if stage == 'fetch' else item[0]
+        print(f"⚠️ {watchlist[pos]} 失敗：{e}")
+
+    def sink(seq, item):
+        if item is None:
+            return
+        pos, res = item
+        state.append(res, pos)
+        if writer is not None:
+            writer.write(res)
+        print(f"✅ {res['symbol']}: ${res['price']:.2f} ({res['changePercent']:+.2f}%) - {res['recommendation']['action'].upper()}")
+
+    # 抓取以多執行緒重疊網路等待；計算階段維持單執行緒（指標快取與報酬彙整不需加鎖）
+    pipe_cfg = cfg.get('pipeline', {}) or {}
+    pipe = Pipeline(
+        [('fetch', fetch, pipe_cfg.get('fetchWorkers', 4)), ('compute', compute, 1)],
+        queue_size=pipe_cfg.get('queueSize', 32),
+        window=pipe_cfg.get('window', 64),
+        on_error=on_error
+    )
+    # 從開啟快照暫存檔到正式替換之間任何一步失敗（含快取寫回），都刪除暫存檔；close() 之後 abort() 不動作
+    writer = None if shard else snapshot_writer(updated_at)
+    try:
+        stats = pipe.run(positions, sink, serial=serial)
+        print(f"\n🧵 管線（{'依序' if serial else '多執行緒'}）：" + "、".join(
+            f"{name} {st['items']} 項（忙碌 {st['busySeconds']}s、阻塞 {st['blockedSeconds']}s）"
+            for name, st in stats.items()))
+
+        if cache is not None:
+            cache.save()
+            print(f"🗃️ 指標快取：命中 {cache.hits}、重算 {cache.misses}（共 {len(cache)} 筆）")
+        if bar_store is not None:
+            bar_store.save()
+            print(f"🪙 本地日 K：{len(bar_store)} 檔，本次調整除權息/分割 {bar_store.adjusted} 檔")
+
+        if shard:
+            # 名稱映射與分片無關，只由第 0 片產出
+            names = None
+            if index == 0:
+                try:
+                    names = build_full_name_map()
+                except Exception as e:
+                    print(f"⚠️ 無法建立名稱映射：{e}")
+            path = write_partial(shard_dir, index, count, len(watchlist), updated_at, state.items(), names, returns)
+            print(f"\n🧩 已儲存分片結果至 {path}（{len(state)} 檔）")
+            return
+
+        if not writer.count:
+            writer.abort()
+            print("\n❌ 沒有成功抓取任何股票資料")
+            return
+        writer.close()
+    finally:
+        if writer is not None:
+            writer.abort()
     print(f"\n💾 已儲存至 {OUTPUT_PATH}")
+    print(f"📅 已儲存歷史快照至 {HISTORY_DIR / (updated_at[:10] + '.json')}")
 
-    HISTORY_DIR.mkdir(exist_ok=True)
-    today = datetime.now().strftime('%Y-%m-%d')
-    with open(HISTORY_DIR / f"{today}.json", 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
-    print(f"📅 已儲存歷史快照至 {HISTORY_DIR / (today + '.json')}")
+    # 彙總、選股與警示直接讀取欄式儲存，dict 只在寫出 JSON 時逐筆還原
+    save_derived(state, updated_at)
+    update_alerts(cfg, state, updated_at)
+    if returns is not None:
+        update_risk(cfg, returns, updated_at)
 
     # 產出全市場名稱映射（public/names.json），供前端即時查詢使用（加入代碼過濾，避免檔案過大）
     try:
-        full_name_map = {}
-        for mode, suffix in ((2, '.TW'), (4, '.TWO')):
-            rows = fetch_isin_rows(mode)
-            for r in rows:
-                if len(r) >= 1:
-                    parts = r[0].split()
-                    if not parts:
-                        continue
-                    code = parts[0]
-                    cname = r[0].split(maxsplit=1)[1] if len(r[0].split(maxsplit=1)) > 1 else code
-                    if is_allowed_security(code, r):
-                        full_name_map[f"{code}{suffix}"] = cname
-        names_path = Path(__file__).parent.parent / 'public' / 'names.json'
-        with open(names_path, 'w', encoding='utf-8') as nf:
-            json.dump(full_name_map, nf, ensure_ascii=False)
-        size_kb = names_path.stat().st_size // 1024 if names_path.exists() else 0
-        print(f"📝 已輸出名稱映射至 {names_path}（{len(full_name_map)} 筆，約 {size_kb} KB）")
+        save_names(build_full_name_map())
     except Exception as e:
         print(f"⚠️ 無法輸出名稱映射：{e}")
 
-    print(f"\n🎉 完成！成功更新 {len(stocks)} 檔股票")
+    print(f"\n🎉 完成！成功更新 {len(state)} 檔股票")
+
+
+def update_alerts(cfg, stocks, updated_at):
+    """依 config.json 的 alerts.rules 評估本次快照，觸發結果寫入 public/alerts.json"""
+    alerts_cfg = cfg.get('alerts') or {}
+    rules = alerts_cfg.get('rules') or []
+    if not alerts_cfg.get('enabled') or not rules:
+        return
+    triggered = run_alerts(rules, stocks, updated_at, ALERTS_STATE_PATH, ALERTS_PATH)
+    for event in triggered:
+        print(f"🔔 {event['message']}")
+    print(f"🔔 警示規則 {len(rules)} 條，觸發 {len(triggered)} 條，已儲存至 {ALERTS_PATH}")
+
+
+def update_risk(cfg, returns, updated_at):
+    """以本次日報酬增量更新風險模型，並公開 watchlist 與基準的子矩陣"""
+    risk_cfg = cfg.get('risk') or {}
+    model = RiskModel.load(MODEL_DIR, decay=float(risk_cfg.get('decay', 0.94)))
+    days, filled = model.update_many(returns)
+    model.refresh()
+    model.save(MODEL_DIR)
+    published = write_risk(
+        model,
+        risk_cfg.get('publish') or cfg.get('watchlist', []),
+        updated_at,
+        benchmark=risk_cfg.get('benchmark'),
+        shrinkage=float(risk_cfg.get('shrinkage', 0.2)),
+        path=RISK_PATH
+    )
+    print(f"📐 風險模型新增 {days} 個交易日、回補 {filled} 筆代碼-日報酬（{len(model.symbols)} 檔），"
+          f"已輸出 {len(published)} 檔子矩陣至 {RISK_PATH}")
+
+
+def merge(count, shard_dir):
+    """合併 N 個分片部分結果，寫出與單一程序執行相同的輸出"""
+    print(f"🧩 合併 {count} 個分片結果…")
+    partials = load_partials(shard_dir, count)
+    output, names = merge_partials(partials)
+    if not output['stocks']:
+        print("\n❌ 沒有成功抓取任何股票資料")
+        return
+    save_outputs(output)
+    cfg = load_config()
+    update_alerts(cfg, output['stocks'], output['updatedAt'])
+    if (cfg.get('risk') or {}).get('enabled'):
+        update_risk(cfg, merge_returns(partials), output['updatedAt'])
+    if names is not None:
+        save_names(names)
+    print(f"\n🎉 完成！合併 {len(output['stocks'])} 檔股票")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+技術指標差異驗證工具（僅使用 Python 標準庫）
+- 產生隨機與邊界 K 線序列：None 缺值、平盤、單邊上漲（avg_loss == 0）、單邊下跌、
+  歷史過短、新上市（前段全為 None）、漲跌停連續、極小/極大價格
+- 同時執行參考實作（update_data_light.py）與快速實作（indicators_fast.py），
+  逐一比對 sma / rsi / rsi_series / macd / detect_divergence 與最終 recommend() 結果
+- recommend() 的多週期確認與 build_stock() 相同：以交易日 timestamp 經 timeframes.resample_quote
+  重取樣出週/月 K，參考與快速兩邊使用同一份重取樣結果
+- 超出容許誤差即列為差異並以非零狀態碼結束；另報告各函式的加速倍率
+- 若已安裝 pandas 與 yfinance，另比對 update_data.py 的 calculate_rsi（兩者定義不同，僅供參考）
+
+使用方式：
+    python scripts/verify_indicators.py --cases 200 --seed 1 --repeat 3
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import random
+import sys
+from time import perf_counter
+
+import indicators_fast as fast
+import update_data_light as ref
+from timeframes import TIMEFRAMES, resample_quote
+
+CFG_IND = {
+    'sma_short': 5,
+    'sma_long': 20,
+    'rsi_period': 14,
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'timeframes': list(TIMEFRAMES),
+}
+LENGTHS = (0, 1, 5, 13, 14, 15, 19, 20, 21, 25, 26, 34, 35, 36, 40, 62, 130, 250)
+# 序列最後一根 K 棒的日期（台北時間 13:30 收盤）；往前依交易日（週一至週五）排列
+LAST_BAR_TS = 1_735_623_000
+UTC_OFFSET = 8 * 3600
+DAY = 86400
+
+
+# --- 測試序列 ---
+
+def _walk(rng, n, start=100.0, vol=0.02, limit=None):
+    p = start
+    out = []
+    for _ in range(n):
+        r = rng.gauss(0, vol)
+        if limit:
+            r = max(-limit, min(limit, r))
+        p = max(0.01, p * (1 + r))
+        out.append(round(p, 2))
+    return out
+
+
+def trading_timestamps(n, last=LAST_BAR_TS):
+    """n 個依序的交易日 timestamp（略過週六、日），最後一個為 last"""
+    out = []
+    ts = last
+    while len(out) < n:
+        if (ts + UTC_OFFSET) // DAY % 7 not in (2, 3):  # 1970-01-01 為週四，餘 2/3 為週六/日
+            out.append(ts)
+        ts -= DAY
+    return out[::-1]
+
+
+def resample(closes, volumes):
+    """以交易日 timestamp 重取樣出週/月 K（與 build_stock() 相同的路徑）"""
+    return resample_quote(trading_timestamps(len(closes)), {'close': closes, 'volume': volumes},
+                          timeframes=CFG_IND['timeframes'], utc_offset=UTC_OFFSET)
+
+
+def _volumes(rng, n):
+    return [rng.choice((None, 0)) if rng.random() < 0.05 else rng.randint(1000, 500000) for _ in range(n)]
+
+
+def generate_cases(count=50, seed=0):
+    """回傳 [(類別, 收盤價, 成交量)]"""
+    rng = random.Random(seed)
+    cases = []
+    for n in LENGTHS:
+        cases.append(('short', _walk(rng, n), _volumes(rng, n)))
+        cases.append(('flat', [50.0] * n, [1000] * n))
+        cases.append(('rising', [10.0 + i for i in range(n)], _volumes(rng, n)))
+        cases.append(('falling', [500.0 - i for i in range(n)], _volumes(rng, n)))
+        cases.append(('allNone', [None] * n, [None] * n))
+    for _ in range(count):
+        n = rng.choice((30, 45, 62, 66, 130, 250))
+        cases.append(('random', _walk(rng, n, start=rng.uniform(5, 1000)), _volumes(rng, n)))
+
+        closes = _walk(rng, n)
+        p = rng.uniform(0.02, 0.3)
+        gaps = [None if rng.random() < p else c for c in closes]
+        if rng.random() < 0.5:
+            gaps[-1] = None
+        cases.append(('gaps', gaps, _volumes(rng, n)))
+
+        listed = rng.randint(1, n)
+        cases.append(('newListing', [None] * (n - listed) + _walk(rng, listed), _volumes(rng, n)))
+
+        cases.append(('limitMoves', _walk(rng, n, vol=0.08, limit=0.1), _volumes(rng, n)))
+        cases.append(('tinyPrice', [round(c / 1000, 2) or 0.01 for c in _walk(rng, n)], _volumes(rng, n)))
+        cases.append(('hugePrice', [c * 1000 for c in _walk(rng, n)], _volumes(rng, n)))
+        zig = [100.0 + (1 if i % 2 else -1) * rng.uniform(0, 3) for i in range(n)]
+        cases.append(('zigzag', zig, _volumes(rng, n)))
+        steps = [100.0]
+        for _ in range(n - 1):
+            steps.append(steps[-1] + rng.choice((0.0, 0.0, 0.5, -0.5)))
+        cases.append(('steps', steps, _volumes(rng, n)))
+    # 約 3 年（780 個交易日）才有足夠的月 K 計算月線指標；參考實作為 O(n²)，只產生少量長序列
+    for _ in range(max(1, count // 10)):
+        n = 780
+        cases.append(('longHistory', _walk(rng, n, start=rng.uniform(5, 1000)), _volumes(rng, n)))
+        closes = _walk(rng, n)
+        cases.append(('longGaps', [None if rng.random() < 0.1 else c for c in closes], _volumes(rng, n)))
+    return cases
+
+
+# --- 比對 ---
+
+def same(a, b, tol):
+    """遞迴比較；浮點數以相對/絕對誤差 tol 判斷"""
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        if math.isnan(a) or math.isnan(b):
+            return math.isnan(a) and math.isnan(b)
+        return math.isclose(a, b, rel_tol=tol, abs_tol=tol)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y, tol) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k], tol) for k in a)
+    return a == b
+
+
+def _call(fn, args):
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, e
+
+
+def reference_rsi_series(closes):
+    """原 compute_indicators() 的逐前綴 RSI 計算"""
+    out = []
+    for i in range(14, len(closes)):
+        r = ref.rsi(closes[:i+1], 14)
+        if r:
+            out.append(r)
+    return out
+
+
+def _reference_trend(closes):
+    """timeframe_indicators() 的趨勢判斷，改用參考實作；K 棒不足時不參與建議（回傳 None）"""
+    if sum(1 for c in closes if c is not None) < ref.timeframe_min_bars(CFG_IND):
+        return None
+    sma_s = ref.sma(closes, CFG_IND['sma_short'])
+    sma_l = ref.sma(closes, CFG_IND['sma_long'])
+    if sma_s and sma_l:
+        return 'up' if sma_s > sma_l else 'down' if sma_s < sma_l else None
+    return None
+
+
+def reference_recommend(closes, volumes):
+    """原 compute_indicators() + recommend() 流程（全部使用參考實作）"""
+    rsi_values = reference_rsi_series(closes)
+    macd_line, signal_line, histogram = ref.macd(closes)
+    divergence = ref.detect_divergence(closes, rsi_values) if len(rsi_values) > 20 else None
+    return ref.recommend(
+        ref.sma(closes, 5), ref.sma(closes, 20), ref.sma(closes, 200), ref.rsi(closes, 14),
+        macd_line, signal_line, histogram, ref.detect_volume_trend(volumes), divergence, CFG_IND,
+        {tf: {'trend': _reference_trend(bars['close'])} for tf, bars in resample(closes, volumes).items()}
+    )
+
+
+def fast_recommend(closes, volumes):
+    """目前 compute_indicators() + recommend() 流程"""
+    ind = ref.compute_indicators(closes, volumes, CFG_IND, resample(closes, volumes))
+    return ref.recommend(
+        ind['sma5'], ind['sma20'], ind['sma200'], ind['rsi'],
+        ind['macd_line'], ind['signal_line'], ind['histogram'],
+        ind['volume_trend'], ind['divergence'], CFG_IND, ind['timeframes']
+    )
+
+
+# 名稱 -> (參考實作, 快速實作, 由 (closes, volumes) 產生參數)
+CHECKS = {
+    'sma5': (ref.sma, fast.sma, lambda c, v: (c, 5)),
+    'sma20': (ref.sma, fast.sma, lambda c, v: (c, 20)),
+    'sma200': (ref.sma, fast.sma, lambda c, v: (c, 200)),
+    'rsi': (ref.rsi, fast.rsi, lambda c, v: (c, 14)),
+    'rsi_series': (reference_rsi_series, fast.rsi_series, lambda c, v: (c,)),
+    'macd': (ref.macd, fast.macd, lambda c, v: (c,)),
+    'detect_divergence': (ref.detect_divergence, fast.detect_divergence,
+                          lambda c, v: (c, reference_rsi_series(c))),
+    'recommend': (reference_recommend, fast_recommend, lambda c, v: (c, v)),
+}
+
+
+def verify(cases, tol=1e-9, repeat=1) -> dict:
+    """回傳 {函式: {'cases', 'divergences', 'referenceErrors', 'speedup', 'examples'}}"""
+    report = {}
+    for name, (ref_fn, fast_fn, make_args) in CHECKS.items():
+        divergences = 0
+        ref_errors = 0
+        examples = []
+        ref_time = fast_time = 0.0
+        for kind, closes, volumes in cases:
+            args = make_args(closes, volumes)
+            t0 = perf_counter()
+            for _ in range(repeat):
+                expected, ref_err = _call(ref_fn, args)
+            t1 = perf_counter()
+            for _ in range(repeat):
+                actual, fast_err = _call(fast_fn, args)
+            t2 = perf_counter()
+            ref_time += t1 - t0
+            fast_time += t2 - t1
+            if ref_err is not None and fast_err is None:
+                # 參考實作本身無法處理的輸入（例如價格含 None 時的背離偵測）
+                ref_errors += 1
+                continue
+            if fast_err is not None and (ref_err is None or type(ref_err) is not type(fast_err)):
+                ok = False
+                actual = f"{type(fast_err).__name__}: {fast_err}"
+            else:
+                ok = same(expected, actual, tol)
+            if not ok:
+                divergences += 1
+                if len(examples) < 3:
+                    examples.append({'kind': kind, 'bars': len(closes), 'reference': repr(expected), 'fast': repr(actual)})
+        report[name] = {
+            'cases': len(cases),
+            'divergences': divergences,
+            'referenceErrors': ref_errors,
+            'referenceSeconds': round(ref_time, 4),
+            'fastSeconds': round(fast_time, 4),
+            'speedup': round(ref_time / fast_time, 2) if fast_time else None,
+            'examples': examples,
+        }
+    return report
+
+
+def pandas_rsi_crosscheck(cases, tol=1e-6):
+    """比對 update_data.py 的 pandas RSI；未安裝依賴時回傳 None"""
+    if not all(importlib.util.find_spec(m) for m in ('pandas', 'yfinance', 'requests')):
+        return None
+    import pandas as pd
+    import update_data
+    compared = differ = 0
+    for _, closes, _ in cases:
+        light = ref.rsi(closes, 14)
+        series = pd.Series([float('nan') if c is None else c for c in closes], dtype='float64')
+        heavy = update_data.calculate_rsi(series, 14)
+        heavy = None if heavy is None or math.isnan(heavy) else float(heavy)
+        compared += 1
+        if not same(light, heavy, tol):
+            differ += 1
+    return {'cases': compared, 'differ': differ}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='比對技術指標參考實作與快速實作')
+    parser.add_argument('--cases', type=int, default=50, help='每個隨機類別的序列數（預設 50）')
+    parser.add_argument('--seed', type=int, default=0, help='隨機種子')
+    parser.add_argument('--repeat', type=int, default=1, help='計時重複次數')
+    parser.add_argument('--tolerance', type=float, default=1e-9, help='浮點容許誤差（相對與絕對）')
+    parser.add_argument('--json', default=None, help='另存 JSON 報告的路徑')
+    args = parser.parse_args(argv)
+
+    cases = generate_cases(args.cases, args.seed)
+    print(f"🧪 共 {len(cases)} 組序列（種子 {args.seed}，容許誤差 {args.tolerance:g}）\n")
+    report = verify(cases, args.tolerance, args.repeat)
+
+    print(f"{'函式':<20}{'差異':>6}{'參考例外':>10}{'參考(s)':>10}{'快速(s)':>10}{'加速':>8}")
+    for name, r in report.items():
+        print(f"{name:<20}{r['divergences']:>6}{r['referenceErrors']:>10}"
+              f"{r['referenceSeconds']:>10.4f}{r['fastSeconds']:>10.4f}{(r['speedup'] or 0):>7.1f}x")
+        for ex in r['examples']:
+            print(f"   ↳ {ex['kind']}（{ex['bars']} 根）參考={ex['reference']} 快速={ex['fast']}")
+
+    cross = pandas_rsi_crosscheck(cases)
+    if cross is None:
+        print("\nℹ️ 未安裝 pandas/yfinance，略過與 update_data.py calculate_rsi 的比對")
+    else:
+        print(f"\nℹ️ update_data.py calculate_rsi 與輕量版 rsi 在 {cross['differ']} / {cross['cases']} 組序列結果不同（定義不同，僅供參考）")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'seed': args.seed, 'tolerance': args.tolerance, 'functions': report, 'pandasRsi': cross},
+                      f, ensure_ascii=False, indent=2)
+        print(f"💾 已儲存報告至 {args.json}")
+
+    failed = sum(r['divergences'] for r in report.values())
+    if failed:
+        print(f"\n❌ 共 {failed} 筆差異超出容許誤差")
+        return 1
+    print("\n✅ 快速實作與參考實作一致")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
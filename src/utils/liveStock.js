@@ -32,14 +32,60 @@ async function loadNamesMap() {
   return __namesMapPromise
 }
 
+// 分片搜尋索引（public/search/，由 scripts/search_index.py 產出）
+// 分片規則需與 search_index.shard_key 一致：英數字元 c{字元}，其他字元依碼位 h{碼位 % 64}
+const SEARCH_HASH_BUCKETS = 64
+const __searchShards = {}
+
+function shardKey(text) {
+  // 以完整碼位取首字（同 Python 的 ord），非 BMP 字元也與 search_index.shard_key 落在同一分片
+  const ch = String.fromCodePoint(text.codePointAt(0)).toLowerCase()
+  if (/^[0-9a-z]$/.test(ch)) return `c${ch}`
+  return `h${(ch.codePointAt(0) % SEARCH_HASH_BUCKETS).toString(16).padStart(2, '0')}`
+}
+
+async function loadSearchShard(key) {
+  if (!__searchShards[key]) {
+    __searchShards[key] = fetch(`/search/${key}.json`)
+      .then((res) => (res.ok ? res.json() : { codes: {}, grams: {} }))
+      .catch(() => ({ codes: {}, grams: {} }))
+  }
+  return __searchShards[key]
+}
+
+// 以代碼或中文名稱解析出完整代碼（含 .TW/.TWO），找不到時回傳 null
+export async function resolveSymbol(query) {
+  const q = (query || '').trim()
+  if (!q) return null
+  const shard = await loadSearchShard(shardKey(q))
+
+  // 代碼：索引內直接記錄交易所後綴，不需試探
+  const code = q.toUpperCase()
+  const hit = shard.codes[code]
+  if (hit) return { symbol: `${code}.${hit[0]}`, name: hit[1] }
+
+  // 名稱：以首個 2 字 n-gram（單字則以前綴）取得候選，再比對完整名稱；字數以碼位計，與 name_ngrams 相同
+  const head = [...q].slice(0, 2)
+  const gram = head.join('')
+  const candidates = head.length === 2
+    ? (shard.grams[gram] || [])
+    : Object.keys(shard.grams).filter((g) => g.startsWith(gram)).flatMap((g) => shard.grams[g])
+  const matches = candidates.filter((c) => shard.codes[c] && shard.codes[c][1].includes(q))
+  if (matches.length === 0) return null
+  const best = matches.find((c) => shard.codes[c][1] === q) || matches[0]
+  return { symbol: `${best}.${shard.codes[best][0]}`, name: shard.codes[best][1] }
+}
+
 // 即時抓取單一股票資料
 export async function fetchLiveStock(symbol) {
   try {
     // 確保股票代碼格式正確（加上 .TW 或 .TWO 後綴）
     let fullSymbol = symbol.toUpperCase()
+    let resolved = null
     if (!fullSymbol.includes('.')) {
-      // 預設嘗試 .TW，如果失敗則嘗試 .TWO
-      fullSymbol = `${fullSymbol}.TW`
+      // 先查搜尋索引取得正確交易所；索引沒有時預設嘗試 .TW，如果失敗則嘗試 .TWO
+      resolved = await resolveSymbol(symbol)
+      fullSymbol = resolved ? resolved.symbol : `${fullSymbol}.TW`
     }
 
     // 使用我們自己的 API 代理（避免 CORS 問題）
@@ -47,8 +93,8 @@ export async function fetchLiveStock(symbol) {
     const response = await fetch(url)
 
     if (!response.ok) {
-      // 如果 .TW 失敗，嘗試 .TWO
-      if (fullSymbol.endsWith('.TW')) {
+      // 如果 .TW 失敗，嘗試 .TWO（索引已確認交易所時不再試探）
+      if (!resolved && fullSymbol.endsWith('.TW')) {
         const twoSymbol = fullSymbol.replace('.TW', '.TWO')
         return fetchLiveStock(twoSymbol)
       }
@@ -123,9 +169,8 @@ export async function fetchLiveStock(symbol) {
       reason = `價格跌破20日均線，RSI ${rsi.toFixed(1)} 偏高，建議觀望或減碼`
     }
 
-    // 嘗試以 names.json 取得中文名稱
-    const namesMap = await loadNamesMap()
-    const mappedName = namesMap[fullSymbol]
+    // 優先使用索引名稱，否則嘗試以 names.json 取得中文名稱
+    const mappedName = resolved ? resolved.name : (await loadNamesMap())[fullSymbol]
 
     return {
       symbol: fullSymbol,
@@ -0,0 +1,59 @@
+import copy
+import math
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+# scripts/ 下的模組以同層 import 互相引用（非套件），測試時比照直接執行腳本的路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+
+START = 1_500_000_000
+DAY = 86400
+
+INDICATORS = {
+    'sma_short': 5,
+    'sma_long': 20,
+    'rsi_period': 14,
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'timeframes': ['weekly', 'monthly'],
+}
+
+
+def close_at(day, symbol=''):
+    """第 day 天的收盤價；不同代碼以 CRC32 錯開相位，同一代碼的任何區段都取自同一條序列"""
+    x = day + zlib.crc32(symbol.encode('utf-8')) % 97
+    return 100 + 10 * math.sin(x / 9) + 8 * math.sin(x / 40) + day * 0.02
+
+
+def chart_payload(first, last, symbol='', adjclose=None, events=None):
+    """第 first ~ last-1 天（每日一根）的 chart API 回應
+    adjclose: 與收盤價等長的還原價；events: chart API 的 events（dividends / splits）
+    """
+    days = range(first, last)
+    r0 = {
+        'meta': {'gmtoffset': 28800},
+        'timestamp': [START + i * DAY for i in days],
+        'indicators': {'quote': [{
+            'close': [close_at(i, symbol) for i in days],
+            'volume': [1000 + (i * 37) % 500 for i in days],
+        }]},
+    }
+    if adjclose is not None:
+        r0['indicators']['adjclose'] = [{'adjclose': adjclose}]
+    if events is not None:
+        r0['events'] = events
+    return {'chart': {'result': [r0]}}
+
+
+@pytest.fixture
+def cfg():
+    """build_stock() / run() 使用的最小設定；各測試可自行修改副本"""
+    return {'indicators': copy.deepcopy(INDICATORS)}
+
+
+@pytest.fixture
+def chart():
+    return chart_payload
@@ -0,0 +1,54 @@
+import json
+
+from alerts import AlertIndex, run_alerts
+
+VALID = {'id': '2330-rsi', 'symbol': '2330.TW', 'field': 'rsi', 'op': 'below', 'value': 30}
+MALFORMED = [
+    {'id': 'no-op', 'symbol': '2330.TW', 'field': 'rsi', 'value': 30},
+    {'id': 'bad-field', 'symbol': '2330.TW', 'field': 'pe', 'op': 'below', 'value': 10},
+    {'id': 'bad-op', 'symbol': '2330.TW', 'field': 'rsi', 'op': 'crosses', 'value': 30},
+    {'id': 'bad-value', 'symbol': '2330.TW', 'field': 'price', 'op': 'above', 'value': 'high'},
+    {'id': 'bad-signal', 'symbol': '2330.TW', 'field': 'signals', 'op': 'has', 'value': ['a']},
+    dict(VALID),
+    'not-a-rule',
+]
+
+
+def stock(rsi):
+    return {'symbol': '2330.TW', 'indicators': {'rsi': rsi}, 'recommendation': {}}
+
+
+def test_malformed_rules_are_skipped():
+    index = AlertIndex([VALID] + MALFORMED)
+    assert list(index.rules) == ['2330-rsi']
+    assert len(index.skipped) == len(MALFORMED)
+
+
+def test_run_alerts_keeps_going_with_malformed_rules(tmp_path, capsys):
+    state, out = tmp_path / 'last.json', tmp_path / 'alerts.json'
+    rules = MALFORMED + [VALID]
+    run_alerts(rules, [stock(40)], 't0', state, out)
+    triggered = run_alerts(rules, [stock(25)], 't1', state, out)
+
+    assert [e['id'] for e in triggered] == ['2330-rsi']
+    assert json.loads(out.read_text(encoding='utf-8'))['triggered'][0]['id'] == '2330-rsi'
+    assert '略過警示規則 bad-op' in capsys.readouterr().out
+
+
+def test_remove_drops_empty_index_entries_and_fields():
+    rules = [
+        VALID,
+        {'id': 'rsi-high', 'symbol': '2330.TW', 'field': 'rsi', 'op': 'above', 'value': 70},
+        {'id': 'buy', 'symbol': '2330.TW', 'field': 'action', 'op': 'becomes', 'value': 'buy'},
+    ]
+    index = AlertIndex(rules)
+    index.remove('2330-rsi')
+    assert index.fields == {'2330.TW': ['rsi', 'action']}
+    assert ('2330.TW', 'rsi', 'below') not in index.numeric
+    index.remove('rsi-high')
+    assert index.fields == {'2330.TW': ['action']}
+    index.remove('buy')
+    assert index.fields == {} and index.numeric == {} and index.category == {}
+    assert index.crossed('2330.TW', 'rsi', 40, 20) == []
+    index.add(dict(VALID))
+    assert index.fields == {'2330.TW': ['rsi']}
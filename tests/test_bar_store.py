@@ -0,0 +1,86 @@
+import pytest
+
+from bar_store import BarStore, extract_bars, parse_events
+from conftest import DAY, START, chart_payload, close_at
+
+
+def response(first, last, scale=1.0, adj_ratio=None, events=None):
+    """第 first ~ last-1 天的 result[0]；收盤價乘上 scale，adj_ratio 給定時附上 還原價 = 收盤價 × adj_ratio"""
+    r0 = chart_payload(first, last, events=events)['chart']['result'][0]
+    quote = r0['indicators']['quote'][0]
+    quote['close'] = [c * scale for c in quote['close']]
+    if adj_ratio is not None:
+        r0['indicators']['adjclose'] = [{'adjclose': [c * adj_ratio for c in quote['close']]}]
+    return r0
+
+
+def merge(store, r0):
+    return store.merge('2330.TW', extract_bars(r0), parse_events(r0))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path / 'bars.json', history_days=1130)
+
+
+def test_overlap_detects_split(store):
+    merge(store, response(0, 100, adj_ratio=1.0))
+    bars, actions = merge(store, response(90, 120, scale=0.5, adj_ratio=1.0))
+    assert actions == [('split', 0.5)]
+    assert bars['close'][0] == pytest.approx(close_at(0) * 0.5)
+    assert bars['adj'][0] == pytest.approx(close_at(0) * 0.5)
+    assert bars['volume'][0] == 2000
+    assert len(bars['ts']) == 120 and store.adjusted == 1
+
+
+def test_overlap_detects_dividend(store):
+    merge(store, response(0, 100, adj_ratio=1.0))
+    bars, actions = merge(store, response(90, 120, adj_ratio=0.97))
+    assert actions == [('dividend', pytest.approx(0.97))]
+    assert bars['close'][0] == pytest.approx(close_at(0))
+    assert bars['adj'][0] == pytest.approx(close_at(0) * 0.97)
+
+
+def test_events_adjust_when_no_overlap(store):
+    merge(store, response(0, 100, adj_ratio=1.0))
+    events = {
+        'splits': {'a': {'date': START + 105 * DAY, 'numerator': 2, 'denominator': 1}},
+        'dividends': {'b': {'date': START + 120 * DAY, 'amount': 2.0}},
+    }
+    bars, actions = merge(store, response(110, 140, scale=0.5, adj_ratio=1.0, events=events))
+    factor = 1 - 2.0 / (close_at(119) * 0.5)
+    assert actions == [('split', 0.5), ('dividend', pytest.approx(factor))]
+    assert bars['close'][0] == pytest.approx(close_at(0) * 0.5)
+    assert bars['adj'][0] == pytest.approx(close_at(0) * 0.5 * factor)
+
+
+def test_no_overlap_without_events_keeps_old_bars(store):
+    merge(store, response(0, 100, adj_ratio=1.0))
+    bars, actions = merge(store, response(110, 140, adj_ratio=1.0))
+    assert actions == []
+    assert bars['close'][:100] == [close_at(i) for i in range(100)]
+    assert bars['ts'][100] == START + 110 * DAY
+
+
+def test_fallback_adj_then_adjclose_is_not_a_dividend(store):
+    merge(store, response(0, 100))
+    bars, actions = merge(store, response(90, 120, adj_ratio=0.97))
+    assert actions == [] and store.adjusted == 0
+    assert bars['hasAdj']
+    # 舊 K 棒的還原價對齊新回應的基準，收盤價不變
+    assert bars['close'][0] == pytest.approx(close_at(0))
+    assert bars['adj'][0] == pytest.approx(close_at(0) * 0.97)
+
+
+def test_adjclose_then_fallback_reverts_to_close(store):
+    merge(store, response(0, 100, adj_ratio=0.97))
+    bars, actions = merge(store, response(90, 120))
+    assert actions == [] and not bars['hasAdj']
+    assert bars['adj'] == bars['close']
+
+
+def test_empty_response_is_not_replaced_by_stored_bars(store):
+    merge(store, response(0, 100, adj_ratio=1.0))
+    bars, actions = merge(store, response(100, 100))
+    assert bars['ts'] == [] and actions == []
+    assert len(store.get('2330.TW')['ts']) == 100
@@ -0,0 +1,42 @@
+import pytest
+
+import update_data_light as light
+from bar_store import BarStore
+
+
+@pytest.fixture
+def cfg(cfg):
+    cfg['bars'] = {'historyDays': light.HISTORY_DAYS}
+    return cfg
+
+
+def test_daily_indicators_use_three_month_window(cfg, chart):
+    full = light.build_stock('2330.TW', chart(0, 1826), cfg)
+    recent = light.build_stock('2330.TW', chart(1825 - light.DAILY_WINDOW_DAYS, 1826), cfg)
+    assert full['indicators'] == recent['indicators']
+    assert full['timeframes']['monthly']['bars'] >= light.timeframe_min_bars(cfg['indicators'])
+
+
+def test_fresh_fetch_matches_bar_store_top_up(tmp_path, cfg, chart):
+    fresh = light.build_stock('2330.TW', chart(0, 1856), cfg)
+
+    store = BarStore(tmp_path / 'bars.json', history_days=light.HISTORY_DAYS)
+    light.build_stock('2330.TW', chart(0, 1826), cfg, bar_store=store)
+    topped = light.build_stock('2330.TW', chart(1826, 1856), cfg, bar_store=store)
+    assert fresh == topped
+
+
+def test_first_fetch_requests_only_history_days(monkeypatch):
+    urls = []
+    monkeypatch.setattr(light, 'http_get_json', urls.append)
+    light.fetch_chart('2330.TW', history_days=1130, now_ts=1_700_000_000)
+    light.fetch_chart('2330.TW', '1mo')
+    assert 'period1=1602368000&period2=1700000000&' in urls[0]
+    assert 'range=1mo&' in urls[1]
+
+
+def test_empty_top_up_skips_symbol(tmp_path, cfg, chart, capsys):
+    store = BarStore(tmp_path / 'bars.json', history_days=light.HISTORY_DAYS)
+    light.build_stock('2330.TW', chart(0, 1826), cfg, bar_store=store)
+    assert light.build_stock('2330.TW', chart(1826, 1826), cfg, bar_store=store) is None
+    assert '2330.TW 無有效收盤價' in capsys.readouterr().out
@@ -0,0 +1,21 @@
+import update_data_light as light
+from indicator_cache import IndicatorCache
+
+
+def test_threshold_edit_hits_cache(tmp_path, cfg, chart):
+    cache = IndicatorCache(tmp_path / 'indicators.json')
+    light.build_stock('2330.TW', chart(0, 300), cfg, cache=cache)
+
+    cfg['indicators']['rsi_overbought'] = 60
+    cfg['indicators']['rsi_oversold'] = 40
+    light.build_stock('2330.TW', chart(0, 300), cfg, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_indicator_parameter_edit_misses_cache(tmp_path, cfg, chart):
+    cache = IndicatorCache(tmp_path / 'indicators.json')
+    light.build_stock('2330.TW', chart(0, 300), cfg, cache=cache)
+
+    cfg['indicators']['rsi_period'] = 10
+    light.build_stock('2330.TW', chart(0, 300), cfg, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -0,0 +1,22 @@
+import update_data_light as light
+
+HTML = """
+<table>
+<tr><td>有價證券代號及名稱</td><td>國際證券辨識號碼(ISIN Code)</td><td>上市日</td><td>市場別</td><td>產業別</td><td>CFICode</td><td>備註</td></tr>
+<tr><td colspan="7"><b>股票</b></td></tr>
+<tr><td>2330　台積電</td><td>TW0002330008</td><td>1994/09/05</td><td>上市</td><td>半導體業</td><td>ESVUFR</td><td></td></tr>
+<tr><td>9999　測試</td><td>TW0009999000</td><td>2020/01/02</td><td>上市</td><td></td><td>ESVUFR</td><td></td></tr>
+<tr><td>2317　<b>鴻海</b></td><td>TW0002317005</td><td>1991/06/06</td><td>上市</td><td>其他電子業</td><td>ESVUFR</td><td></td></tr>
+</table>
+"""
+
+
+def test_empty_cells_keep_column_positions():
+    parser = light._ISINTableParser()
+    parser.feed(HTML)
+    rows = {r[0].split()[0]: r for r in parser.rows if len(r) >= 5}
+    assert rows['2330'][4] == '半導體業'
+    assert rows['9999'][4] == ''
+    assert rows['9999'][5] == 'ESVUFR'
+    assert len(rows['9999']) == 7
+    assert rows['2317'][0] == '2317　鴻海'
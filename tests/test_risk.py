@@ -0,0 +1,118 @@
+import json
+import math
+import random
+
+import pytest
+
+from risk import RiskModel
+
+SYMBOLS = ['0050.TW', '2330.TW', '2317.TW', '2454.TW']
+
+
+def returns_for(days, symbols=SYMBOLS, seed=0):
+    """{代碼: {日期: 報酬}}：共同因子加個股雜訊，同一 seed 的每個日期固定"""
+    out = {s: {} for s in symbols}
+    for d in days:
+        rng = random.Random(f"{seed}-{d}")
+        market = rng.gauss(0, 0.01)
+        for k, s in enumerate(SYMBOLS):
+            r = (0.5 + 0.3 * k) * market + rng.gauss(0, 0.008)
+            if s in out:
+                out[s][f"2024-{1 + d // 28:02d}-{1 + d % 28:02d}"] = r
+    return out
+
+
+def model_for(days):
+    model = RiskModel()
+    model.update_many(returns_for(days))
+    model.refresh()
+    return model
+
+
+def test_save_load_round_trip(tmp_path):
+    model = model_for(range(40))
+    model.save(tmp_path)
+    model.save(tmp_path)
+    loaded = RiskModel.load(tmp_path)
+    assert loaded.symbols == model.symbols
+    assert list(loaded.cov) == list(model.cov)
+    assert loaded.last_date == model.last_date
+    # 只保留目前世代的 cov 檔
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cov-2.f32', 'meta.json']
+
+
+def test_crash_before_meta_replace_keeps_previous_pair(tmp_path, monkeypatch):
+    old = model_for(range(40))
+    old.save(tmp_path)
+    new = model_for(range(60))
+    new.generation = old.generation
+
+    real_dump = json.dump
+
+    def crash(*args, **kwargs):
+        raise OSError('killed')
+    monkeypatch.setattr(json, 'dump', crash)
+    with pytest.raises(OSError):
+        new.save(tmp_path)
+    monkeypatch.setattr(json, 'dump', real_dump)
+
+    loaded = RiskModel.load(tmp_path)
+    assert loaded.last_date == old.last_date
+    assert list(loaded.cov) == list(old.cov)
+
+
+def test_load_rejects_mismatched_cov(tmp_path):
+    model_for(range(40)).save(tmp_path)
+    other = model_for(range(60))
+    # 以另一個模型的 cov 覆寫目前世代的檔案：長度相同但檢查碼不符
+    (tmp_path / 'cov-1.f32').write_bytes(other.cov.tobytes())
+    loaded = RiskModel.load(tmp_path)
+    assert loaded.symbols == [] and loaded.last_date is None
+
+
+WINDOW = 92
+
+
+def run_daily(runs, late=None, late_from=0):
+    """模擬每日執行：每次提供最近 WINDOW 個交易日的報酬；late 代碼自 late_from 起才抓得到"""
+    model = RiskModel()
+    for t in runs:
+        symbols = [s for s in SYMBOLS if s != late or t >= late_from]
+        model.update_many(returns_for(range(max(0, t - WINDOW + 1), t + 1), symbols))
+    model.refresh()
+    return model
+
+
+def test_missed_runs_and_late_symbol_match_daily_model():
+    days = range(120)
+    daily = run_daily(days)
+    skipped = run_daily([t for t in days if t % 7 not in (2, 3) and not 40 <= t < 55])
+    late = run_daily(days, late='2454.TW', late_from=60)
+    holdings = {'2330.TW': 600, '2317.TW': 250, '2454.TW': 150}
+    expected = daily.submatrix(SYMBOLS)
+    want = daily.portfolio_risk(holdings, benchmark='0050.TW')
+    for model in (skipped, late):
+        got = model.submatrix(SYMBOLS)
+        for row, ref in zip(got, expected):
+            assert row == pytest.approx(ref, rel=1e-4)
+        risk = model.portfolio_risk(holdings, benchmark='0050.TW')
+        assert risk['volatility'] == pytest.approx(want['volatility'], rel=1e-4)
+        assert risk['beta'] == pytest.approx(want['beta'], rel=1e-4)
+
+
+def test_portfolio_risk_sanity():
+    model = model_for(range(80))
+    holdings = {'2330.TW': 500, '2317.TW': 300, '2454.TW': 200, '9999.TW': 100}
+    risk = model.portfolio_risk(holdings, benchmark='0050.TW')
+    assert risk['missing'] == ['9999.TW']
+    assert sum(risk['riskContribution']) == pytest.approx(1.0)
+    total = 1000
+    for level, z in (('95', 1.6449), ('99', 2.3263)):
+        assert risk['var'][level] == pytest.approx(z * risk['volatility'] * total)
+    assert risk['annualVolatility'] == pytest.approx(risk['volatility'] * math.sqrt(252))
+
+    single = model.portfolio_risk({'2330.TW': 1})
+    assert single['volatility'] == pytest.approx(math.sqrt(model.covariance('2330.TW', '2330.TW')))
+    assert single['riskContribution'] == pytest.approx([1.0])
+    bench = model.portfolio_risk({'0050.TW': 1}, benchmark='0050.TW')
+    assert bench['beta'] == pytest.approx(1.0)
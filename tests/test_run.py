@@ -0,0 +1,40 @@
+import pytest
+
+import update_data_light as light
+from indicator_cache import IndicatorCache
+
+
+class FailingCache(IndicatorCache):
+    def save(self):
+        raise OSError('disk full')
+
+
+@pytest.fixture
+def cfg(cfg):
+    cfg.update({
+        'watchlist': ['2330.TW', '2454.TW'],
+        'cache': {'enabled': True},
+        'bars': {'enabled': False},
+        'risk': {'enabled': False},
+        'alerts': {'enabled': False},
+    })
+    return cfg
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch, cfg, chart):
+    monkeypatch.setattr(light, 'OUTPUT_PATH', tmp_path / 'public' / 'data.json')
+    monkeypatch.setattr(light, 'HISTORY_DIR', tmp_path / 'history')
+    monkeypatch.setattr(light, 'load_config', lambda: cfg)
+    monkeypatch.setattr(light, 'fetch_chart', lambda symbol, range_=None: chart(0, 120, symbol))
+    monkeypatch.setattr(light, 'fetch_isin_rows', lambda mode: [])
+    return tmp_path
+
+
+def test_failure_after_pipeline_removes_snapshot_temp_files(outputs, monkeypatch):
+    monkeypatch.setattr(light, 'open_indicator_cache',
+                        lambda cfg, shard=None: FailingCache(outputs / 'indicators.json'))
+    with pytest.raises(OSError, match='disk full'):
+        light.run(serial=True)
+    assert list(outputs.rglob('*.tmp')) == []
+    assert not (outputs / 'public' / 'data.json').exists()
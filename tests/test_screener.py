@@ -0,0 +1,52 @@
+import pytest
+
+from screener import Screener, parse_query
+
+
+def stocks():
+    # 信心值只有三種，大量同值以檢驗排序的同值順序
+    return [
+        {
+            'symbol': f'{1000 + i}.TW',
+            'price': 10 + i % 7,
+            'indicators': {'rsi': 20 + i % 5 if i % 4 else None},
+            'recommendation': {'action': 'buy' if i % 2 else 'hold', 'confidence': (0.5, 0.6, 0.7)[i % 3]},
+        }
+        for i in range(60)
+    ]
+
+
+def test_ties_break_the_same_with_and_without_conditions():
+    screener = Screener(stocks())
+    for descending in (True, False):
+        plain = screener.top((), 'confidence', 60, descending)
+        # 永遠成立的條件走 heap 路徑，結果需與無條件查詢相同
+        filtered = screener.top([('price', '>=', 0)], 'confidence', 60, descending)
+        assert plain == filtered
+        key = (lambda i: (-screener.columns['confidence'][i], i)) if descending else \
+            (lambda i: (screener.columns['confidence'][i], i))
+        assert plain == sorted(range(60), key=key)
+
+
+def test_rows_without_order_value_are_skipped():
+    screener = Screener(stocks())
+    ids = screener.top([('action', '=', 'buy')], 'rsi', 60, descending=False)
+    assert ids and all(screener.columns['rsi'][i] is not None for i in ids)
+    assert all(screener.columns['action'][i] == 'buy' for i in ids)
+
+
+def test_parse_query_keeps_category_values_as_strings():
+    conditions = parse_query('symbol = 1002.TW and sector in 2330,半導體業 and rsi between 20,30')
+    assert conditions == [
+        ('symbol', '=', '1002.TW'),
+        ('sector', 'in', ['2330', '半導體業']),
+        ('rsi', 'between', [20.0, 30.0]),
+    ]
+    rows = [{'symbol': '2330', 'price': 1.0}, {'symbol': '2317', 'price': 2.0}]
+    assert Screener(rows).top(parse_query('symbol = 2330'), 'price') == [0]
+
+
+@pytest.mark.parametrize('query', ['rsi between 30', 'rsi between 1,2,3', 'action in ,', 'rsi < high'])
+def test_parse_query_rejects_malformed_values(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
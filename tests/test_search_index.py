@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).parent.parent / 'scripts'
+NAMES = {
+    '2330.TW': '台積電',
+    '2303.TW': '聯電',
+    '2454.TW': '聯發科',
+    '0050.TW': '元大台灣50',
+    '006208.TW': '富邦台50',
+    '6547.TWO': '高端疫苗',
+}
+SCRIPT = (
+    "import json, sys; from search_index import build_search_index; "
+    "print(json.dumps(build_search_index(json.loads(sys.argv[1])), ensure_ascii=False))"
+)
+
+
+def build_with_seed(seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    out = subprocess.run([sys.executable, '-c', SCRIPT, json.dumps(NAMES)],
+                         cwd=SCRIPTS, env=env, capture_output=True, text=True, check=True)
+    return out.stdout
+
+
+def test_shards_do_not_depend_on_hash_seed():
+    outputs = {build_with_seed(seed) for seed in (0, 1, 2, 3)}
+    assert len(outputs) == 1
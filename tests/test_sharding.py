@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import update_data_light as light
+from sharding import load_partials
+
+WATCHLIST = ['0050.TW', '2330.TW', '2317.TW', '2454.TW', '2412.TW', '2303.TW', '6547.TWO', '5478.TWO']
+
+
+@pytest.fixture
+def cfg(cfg):
+    cfg.update({
+        'watchlist': WATCHLIST,
+        'cache': {'enabled': False},
+        'bars': {'enabled': False},
+        'risk': {'enabled': True, 'benchmark': '0050.TW', 'historyDays': 92, 'publish': []},
+        'alerts': {'enabled': False},
+    })
+    return cfg
+
+
+@pytest.fixture
+def use_root(monkeypatch, cfg, chart):
+    """將 run() / merge() 的全部輸入輸出導向 root 目錄，回傳其中的正式輸出讀取函式"""
+    monkeypatch.setattr(light, 'load_config', lambda: cfg)
+    monkeypatch.setattr(light, 'fetch_chart', lambda symbol, *args, **kwargs: chart(0, 300, symbol))
+    monkeypatch.setattr(light, 'fetch_isin_rows', lambda mode: [])
+
+    def use(root):
+        public = root / 'public'
+        for name, path in {
+            'OUTPUT_PATH': public / 'data.json',
+            'AGGREGATES_PATH': public / 'aggregates.json',
+            'SCREENS_PATH': public / 'screens.json',
+            'NAMES_PATH': public / 'names.json',
+            'SEARCH_DIR': public / 'search',
+            'RISK_PATH': public / 'risk.json',
+            'HISTORY_DIR': root / 'history',
+            'MODEL_DIR': root / '.cache' / 'risk',
+        }.items():
+            monkeypatch.setattr(light, name, path)
+        public.mkdir(parents=True, exist_ok=True)
+
+        def read(name):
+            with open(public / name, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data.pop('updatedAt', None)
+            return data
+        return read
+    return use
+
+
+def test_merged_shards_match_single_run(tmp_path, use_root):
+    read = use_root(tmp_path / 'single')
+    light.run(serial=True)
+    single = {name: read(name) for name in ('data.json', 'aggregates.json', 'screens.json', 'risk.json')}
+
+    read = use_root(tmp_path / 'sharded')
+    shard_dir = tmp_path / 'sharded' / 'shards'
+    for index in range(3):
+        light.run(shard=(index, 3), shard_dir=shard_dir, serial=True)
+    light.merge(3, shard_dir)
+    merged = {name: read(name) for name in single}
+
+    assert [s['symbol'] for s in merged['data.json']['stocks']] == WATCHLIST
+    assert merged == single
+
+
+def test_load_partials_rejects_count_mismatch(tmp_path, use_root):
+    use_root(tmp_path)
+    shard_dir = tmp_path / 'shards'
+    for index in range(2):
+        light.run(shard=(index, 2), shard_dir=shard_dir, serial=True)
+    path = shard_dir / 'shard-1-of-2.json'
+    partial = json.loads(path.read_text(encoding='utf-8'))
+    partial['count'] = 3
+    path.write_text(json.dumps(partial, ensure_ascii=False), encoding='utf-8')
+    with pytest.raises(RuntimeError, match='分片數'):
+        load_partials(shard_dir, 2)
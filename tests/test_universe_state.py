@@ -0,0 +1,43 @@
+import copy
+import json
+
+import pytest
+
+import update_data_light as light
+from universe_state import UniverseState
+
+
+def build(chart, cfg, days, symbol, sector=None):
+    cfg = dict(cfg, bars={'historyDays': light.HISTORY_DAYS})
+    sector_map = {symbol: sector} if sector is not None else None
+    return light.build_stock(symbol, chart(0, days, symbol), cfg, sector_map=sector_map)
+
+
+@pytest.fixture
+def stocks(cfg, chart):
+    rows = [
+        build(chart, cfg, 1200, '2330.TW', '半導體業'),   # 週/月線皆有
+        build(chart, cfg, 300, '2454.TW', '半導體業'),    # 只有週線
+        build(chart, cfg, 60, '6547.TWO'),               # 沒有週期、產業別為 None
+        build(chart, cfg, 1, '0050.TW', ''),             # 單根 K 棒，指標皆為 None；空白產業別輸出為 None
+    ]
+    # 非 build_stock 產出（例如 update_data.py）的列可能完全沒有 timeframes
+    legacy = copy.deepcopy(rows[2])
+    legacy['symbol'] = '2317.TW'
+    del legacy['timeframes']
+    return rows + [legacy]
+
+
+def test_round_trip_matches_build_stock_output(stocks):
+    assert {tuple(s['timeframes']) for s in stocks if 'timeframes' in s} == {('weekly', 'monthly'), ('weekly',), ()}
+    assert any(s['sector'] is None for s in stocks)
+    assert any(not s['recommendation']['signals'] for s in stocks)
+
+    state = UniverseState(light.TIMEFRAMES)
+    for pos, stock in enumerate(stocks):
+        state.append(copy.deepcopy(stock), pos)
+    assert state.to_dicts() == stocks
+    # 快照以 json.dump 逐位元組寫出，鍵順序也需相同
+    assert json.dumps(state.to_dicts(), ensure_ascii=False) == json.dumps(stocks, ensure_ascii=False)
+    assert [state.to_dict(i) for i in range(len(state))] == stocks
+    assert list(state.items()) == list(enumerate(stocks))
@@ -0,0 +1,7 @@
+from verify_indicators import generate_cases, verify
+
+
+def test_fast_indicators_match_reference():
+    report = verify(generate_cases(10, seed=0))
+    assert {name: r['divergences'] for name, r in report.items()} == {name: 0 for name in report}
+    assert report['recommend']['cases'] > 0